@@ -0,0 +1,760 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+import scipy
+from scipy.signal import filtfilt, find_peaks, resample_poly
+
+from prototype import (EXTENDED_MATRIX, DETECTORS, ENCODE_METHODS,
+                       FILTER_CACHE, FREQS_HIGH, FREQS_LOW, TONE_CACHE,
+                       FFTPeakDetector, FileDecoder, LiveDecoder,
+                       StreamingBandpass, SyntheticSource, batch_decode,
+                       batch_encode, butter_bandpass, encode_phrase,
+                       generate_tone, make_detector, slowdown_signal,
+                       speed_ratio, speedup_signal, synthesize_phrase)
+
+# Benchmarks for the DTMF prototype. Run with: python benchmarks.py
+
+def _time_per_call(fn, items, repeat=3):
+    # Best-of-N mean time per item, in seconds
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, (time.perf_counter() - start) / len(items))
+    return best
+
+def make_detector_chunks(sample_rate=44100, chunk_duration=0.1, snr_db=20,
+                         n_noise=50, seed=0):
+    # Synthetic decoder chunks: every symbol at random level/occupancy plus noise-only chunks
+    rng = np.random.default_rng(seed)
+    chunk_size = int(sample_rate * chunk_duration)
+    chunks = []
+    labels = []
+
+    for row in EXTENDED_MATRIX:
+        for char in row:
+            for occupancy in (1.0, 0.7):
+                tone_len = int(chunk_size * occupancy)
+                tone = generate_tone(char, duration=tone_len / sample_rate,
+                                     sample_rate=sample_rate)
+                chunk = np.zeros(chunk_size)
+                offset = rng.integers(0, chunk_size - len(tone) + 1)
+                chunk[offset:offset + len(tone)] = tone * rng.uniform(0.1, 1.0)
+                noise_rms = np.sqrt(np.mean(chunk**2)) / 10**(snr_db / 20)
+                chunk += rng.normal(0, noise_rms, chunk_size)
+                chunks.append(chunk)
+                labels.append(char)
+
+    for _ in range(n_noise):
+        chunks.append(rng.normal(0, 0.1, chunk_size))
+        labels.append(None)
+
+    bandpass = StreamingBandpass(600, 2000, sample_rate)
+    filtered = []
+    for chunk in chunks:
+        bandpass.reset()
+        filtered.append(bandpass.process(chunk))
+    return filtered, labels
+
+def bench_detectors(sample_rate=44100, chunk_duration=0.1):
+    # CPU per chunk and accuracy of each detector backend on the same chunks
+    chunks, labels = make_detector_chunks(sample_rate, chunk_duration)
+    n_tones = sum(label is not None for label in labels)
+    n_noise = len(labels) - n_tones
+
+    print(f"[BENCH] Detectors on {len(chunks)} chunks of "
+          f"{len(chunks[0])} samples @ {sample_rate} Hz")
+    results = {}
+    for name in DETECTORS:
+        detector = make_detector(name, sample_rate)
+        correct = 0
+        false_alarms = 0
+        for chunk, label in zip(chunks, labels):
+            detection = detector.detect(chunk)
+            char = (EXTENDED_MATRIX[detection.low_idx][detection.high_idx]
+                    if detection is not None else None)
+            if label is None:
+                false_alarms += char is not None
+            else:
+                correct += char == label
+
+        per_chunk = _time_per_call(detector.detect, chunks)
+        results[name] = {
+            "us_per_chunk": per_chunk * 1e6,
+            "accuracy": correct / n_tones,
+            "false_alarm_rate": false_alarms / n_noise,
+        }
+        print(f"  {name:<9} {per_chunk * 1e6:8.1f} us/chunk  "
+              f"accuracy {correct}/{n_tones}  "
+              f"false alarms {false_alarms}/{n_noise}")
+    return results
+
+def bench_bandpass(sample_rate=44100, chunk_duration=0.1, n_chunks=100, seed=0):
+    # Per-chunk filtfilt (old decoder path) against the streaming sosfilt stage,
+    # on encoded DTMF: the digital silence of the gaps is where the carried
+    # filter state can decay into slow subnormal floats
+    chunk_size = int(sample_rate * chunk_duration)
+    n_samples = chunk_size * n_chunks
+    signal = np.zeros(n_samples)
+    phrase = synthesize_phrase(make_text(40, seed), sample_rate=sample_rate)
+    phrase = phrase[:n_samples] / np.max(np.abs(phrase))
+    signal[:len(phrase)] = phrase
+    chunks = np.split(signal, n_chunks)
+
+    b, a = butter_bandpass(600, 2000, sample_rate)
+    bandpass = StreamingBandpass(600, 2000, sample_rate)
+
+    def run_filtfilt():
+        return np.concatenate([filtfilt(b, a, chunk) for chunk in chunks])
+
+    def run_streaming():
+        bandpass.reset()
+        return np.concatenate([bandpass.process(chunk) for chunk in chunks])
+
+    # Continuity: chunked output against filtering the whole signal at once
+    ff_err = np.max(np.abs(run_filtfilt() - filtfilt(b, a, signal)))
+    bandpass.reset()
+    reference = bandpass.process(signal)
+    st_err = np.max(np.abs(run_streaming() - reference))
+
+    ff_time = _time_per_call(lambda _: run_filtfilt(), [None]) / n_chunks
+    st_time = _time_per_call(lambda _: run_streaming(), [None]) / n_chunks
+
+    print(f"[BENCH] Bandpass over {n_chunks} chunks of {chunk_size} samples")
+    print(f"  filtfilt   {ff_time * 1e6:8.1f} us/chunk  "
+          f"max error vs unchunked {ff_err:.2e}")
+    print(f"  streaming  {st_time * 1e6:8.1f} us/chunk  "
+          f"max error vs unchunked {st_err:.2e}  "
+          f"(speedup x{ff_time / st_time:.1f})")
+    results = {
+        "filtfilt": {"us_per_chunk": ff_time * 1e6, "max_chunk_error": ff_err},
+        "streaming": {"us_per_chunk": st_time * 1e6, "max_chunk_error": st_err},
+    }
+
+    # The file decoders feed 65536-sample blocks, or a whole signal at once:
+    # silent gaps inside one call must not be slower than across calls
+    audio_seconds = n_samples / sample_rate
+    for blocksize in (chunk_size, 65536, n_samples):
+        blocks = [signal[i:i + blocksize] for i in range(0, n_samples, blocksize)]
+
+        def run_blocks(_):
+            bandpass.reset()
+            for block in blocks:
+                bandpass.process(block)
+
+        per_second = _time_per_call(run_blocks, [None]) / audio_seconds
+        results[f"streaming_{blocksize}"] = {"us_per_audio_s": per_second * 1e6}
+        print(f"  streaming in {blocksize:>7}-sample blocks "
+              f"{per_second * 1e6:8.1f} us per audio second")
+    return results
+
+def make_text(n_chars, seed=0):
+    # Random phrase over the encodable symbols, roughly one space per 6 characters
+    rng = np.random.default_rng(seed)
+    alphabet = np.array([char for row in EXTENDED_MATRIX for char in row] + [' '] * 7)
+    return "".join(rng.choice(alphabet, n_chars))
+
+def bench_encoders(lengths=(10, 100, 1000, 10**4, 10**5, 10**6),
+                   char_duration=0.004, gap_duration=0.002, sample_rate=8000):
+    # Per-character loop ('cached') against the one-pass vectorized encoder.
+    # Short tones at 8 kHz keep the 10^6 character case within a few hundred MB.
+    print(f"[BENCH] Encoders, {char_duration * 1e3:g} ms tones + "
+          f"{gap_duration * 1e3:g} ms gaps @ {sample_rate} Hz")
+    results = {}
+    for n_chars in lengths:
+        text = make_text(n_chars)
+        repeat = 3 if n_chars <= 10**4 else 1
+        timings = {}
+        outputs = {}
+        for method in ENCODE_METHODS:
+            def run(_):
+                outputs[method] = synthesize_phrase(text, char_duration,
+                                                    gap_duration, sample_rate,
+                                                    method=method)
+            timings[method] = _time_per_call(run, [None], repeat=repeat)
+        identical = np.array_equal(*outputs.values())
+        outputs.clear()
+
+        results[n_chars] = {**{f"{m}_s": t for m, t in timings.items()},
+                            "identical": identical}
+        print(f"  {n_chars:>8} chars  "
+              + "  ".join(f"{m} {t * 1e3:9.2f} ms" for m, t in timings.items())
+              + f"  speedup x{timings['cached'] / timings['vectorized']:.1f}"
+              + ("" if identical else "  OUTPUT MISMATCH"))
+    return results
+
+def legacy_fft_detect(chunk, sample_rate=44100, tol=40):
+    # The complex-FFT path the detector replaced, kept as a reference:
+    # window, complex FFT, fftfreq and positive mask rebuilt for every chunk
+    window = np.hanning(len(chunk))
+    windowed = chunk * window
+    fft_result = np.abs(np.fft.fft(windowed))
+    freqs = np.fft.fftfreq(len(windowed), 1/sample_rate)
+    pos_mask = freqs > 0
+    freqs = freqs[pos_mask]
+    fft_result = fft_result[pos_mask]
+    peaks, props = find_peaks(fft_result, height=np.max(fft_result)*0.2,
+                              distance=30, prominence=0.1)
+    low = [(i, a) for f, a in zip(freqs[peaks], props['peak_heights'])
+           for i, f_l in enumerate(FREQS_LOW) if abs(f - f_l) < tol]
+    high = [(j, a) for f, a in zip(freqs[peaks], props['peak_heights'])
+            for j, f_h in enumerate(FREQS_HIGH) if abs(f - f_h) < tol]
+    return low, high
+
+def _peak_alloc_per_call(fn, items):
+    # Mean of the peak traced allocation (bytes) during each call
+    tracemalloc.start()
+    total = 0
+    try:
+        for item in items:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(item)
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total / len(items)
+
+def bench_fft_chunk(sample_rate=44100, chunk_duration=0.1):
+    # Allocations and time per chunk: legacy FFT path against the rfft detector
+    chunks, _ = make_detector_chunks(sample_rate, chunk_duration)
+    detector = FFTPeakDetector(sample_rate)
+    detector.detect(chunks[0])  # build the per-length layout outside the measurement
+
+    paths = {
+        "legacy_fft": lambda chunk: legacy_fft_detect(chunk, sample_rate),
+        "rfft": detector.detect,
+    }
+    print(f"[BENCH] FFT detector per chunk ({len(chunks[0])} samples)")
+    results = {}
+    for name, fn in paths.items():
+        per_chunk = _time_per_call(fn, chunks)
+        alloc = _peak_alloc_per_call(fn, chunks)
+        results[name] = {"us_per_chunk": per_chunk * 1e6,
+                         "peak_alloc_bytes": alloc}
+        print(f"  {name:<10} {per_chunk * 1e6:8.1f} us/chunk  "
+              f"peak alloc {alloc / 1024:8.1f} KiB/chunk")
+    return results
+
+def text_accuracy(decoded, expected):
+    # 1 - edit distance / expected length, the usual character accuracy
+    prev = list(range(len(decoded) + 1))
+    for i, e in enumerate(expected, 1):
+        cur = [i]
+        for j, d in enumerate(decoded, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (e != d)))
+        prev = cur
+    return 1 - prev[-1] / max(len(expected), 1)
+
+def bench_compressed_decode(factors=(2, 4, 5, 8, 10), n_chars=60,
+                            sample_rate=44100, detector='goertzel'):
+    # Accuracy parity and cost: decoding accelerated audio directly at the
+    # compressed rate against slowdown_signal followed by a normal decode
+    text = make_text(n_chars, seed=1)
+    expected = "".join(text.split())
+    signal = synthesize_phrase(text, sample_rate=sample_rate)
+    signal /= np.max(np.abs(signal)) + 1e-9
+
+    print(f"[BENCH] Compressed-rate decoding, {n_chars} characters, {detector}")
+    results = {}
+    for factor in factors:
+        fast = speedup_signal(signal, factor)
+
+        start = time.perf_counter()
+        direct = FileDecoder(sample_rate, detector, speed_factor=factor)
+        direct_text = direct.decode_blocks([fast]).text
+        direct_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = slowdown_signal(fast, factor)
+        restored_text = FileDecoder(sample_rate, detector).decode_blocks([restored]).text
+        restored_time = time.perf_counter() - start
+
+        results[factor] = {
+            "direct_accuracy": text_accuracy(direct_text, expected),
+            "restored_accuracy": text_accuracy(restored_text, expected),
+            "direct_s": direct_time,
+            "restored_s": restored_time,
+        }
+        r = results[factor]
+        print(f"  x{factor:<3} direct {r['direct_accuracy']:6.1%} "
+              f"{direct_time * 1e3:8.1f} ms  |  restore+decode "
+              f"{r['restored_accuracy']:6.1%} {restored_time * 1e3:8.1f} ms")
+    return results
+
+def bench_compressed_encode(factors=range(2, 21), n_chars=200,
+                            sample_rate=44100):
+    # Direct synthesis at the compressed rate against encode + speedup_signal
+    text = make_text(n_chars, seed=2)
+    print(f"[BENCH] Compressed encoding, {n_chars} characters @ {sample_rate} Hz")
+    results = {}
+    for factor in factors:
+        def encode_then_speedup(_):
+            signal = synthesize_phrase(text, sample_rate=sample_rate)
+            signal /= np.max(np.abs(signal)) + 1e-9
+            return speedup_signal(signal, factor)
+
+        def direct(_):
+            signal = synthesize_phrase(text, sample_rate=sample_rate,
+                                       compression=factor)
+            signal /= np.max(np.abs(signal)) + 1e-9
+            return signal
+
+        reference = encode_then_speedup(None)
+        output = direct(None)
+        reference /= np.max(np.abs(reference)) + 1e-9
+        error = output - reference
+        ref_time = _time_per_call(encode_then_speedup, [None])
+        direct_time = _time_per_call(direct, [None])
+
+        results[factor] = {
+            "encode_speedup_s": ref_time,
+            "direct_s": direct_time,
+            "max_error": float(np.max(np.abs(error))),
+            "rms_error": float(np.sqrt(np.mean(error**2))),
+        }
+        r = results[factor]
+        print(f"  x{factor:<3} encode+speedup {ref_time * 1e3:8.1f} ms  "
+              f"direct {direct_time * 1e3:7.1f} ms  (x{ref_time / direct_time:5.1f})  "
+              f"max err {r['max_error']:.4f}  rms err {r['rms_error']:.5f}")
+    return results
+
+def bench_speed_factors(factors=np.arange(2, 20.25, 0.25), duration=1.0,
+                        sample_rate=44100, seed=0):
+    # Fractional speedups: resample_poly redesigning its filter every call
+    # against speedup_signal reusing the cached polyphase design
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.3, int(duration * sample_rate))
+    FILTER_CACHE.clear()
+    print(f"[BENCH] Speedup over {len(factors)} factors, "
+          f"{duration:.1f} s @ {sample_rate} Hz")
+
+    def uncached(factor):
+        num, den = speed_ratio(factor)
+        return resample_poly(signal, den, num)
+
+    mismatches = sum(not np.array_equal(speedup_signal(signal, f), uncached(f))
+                     for f in factors)
+    uncached_time = _time_per_call(uncached, factors)
+    cached_time = _time_per_call(lambda f: speedup_signal(signal, f), factors)
+    stats = FILTER_CACHE.stats()
+
+    print(f"  resample_poly  {uncached_time * 1e3:7.2f} ms/call")
+    print(f"  speedup_signal {cached_time * 1e3:7.2f} ms/call  "
+          f"(x{uncached_time / cached_time:.2f})  mismatches {mismatches}  "
+          f"designs {stats['size']}  hit rate {stats['hit_rate']:.1%}")
+    return {
+        "resample_poly_ms": uncached_time * 1e3,
+        "speedup_signal_ms": cached_time * 1e3,
+        "mismatches": mismatches,
+        "filter_cache": stats,
+    }
+
+def bench_multichannel(channels=(1, 2, 4, 8), factor=10, duration=2.0,
+                       sample_rate=44100, seed=0):
+    # One speedup_signal call over (frames, channels) against a per-channel loop
+    rng = np.random.default_rng(seed)
+    print(f"[BENCH] Multi-channel speedup x{factor}, {duration:.1f} s @ {sample_rate} Hz")
+    results = {}
+    for n_channels in channels:
+        audio = rng.normal(0, 0.3, (int(duration * sample_rate), n_channels))
+
+        def per_channel(_):
+            return np.stack([speedup_signal(audio[:, c], factor)
+                             for c in range(n_channels)], axis=1)
+
+        def vectorized(_):
+            return speedup_signal(audio, factor)
+
+        error = np.max(np.abs(vectorized(None) - per_channel(None)))
+        loop_time = _time_per_call(per_channel, [None])
+        vec_time = _time_per_call(vectorized, [None])
+        results[n_channels] = {
+            "per_channel_ms": loop_time * 1e3,
+            "vectorized_ms": vec_time * 1e3,
+            "max_error": float(error),
+        }
+        print(f"  {n_channels} ch  per-channel {loop_time * 1e3:7.2f} ms  "
+              f"vectorized {vec_time * 1e3:7.2f} ms  "
+              f"(x{loop_time / vec_time:.2f})  max error {error:.1e}")
+    return results
+
+def bench_batch_encode(n_phrases=500, n_chars=40, jobs=None, seed=3):
+    # Manifest encoding throughput, inline against a pool over every core
+    jobs = jobs or sorted({1, os.cpu_count()})
+    records = [{'id': f"msg{n:05d}", 'text': make_text(n_chars, seed=seed + n),
+                'params': {}} for n in range(n_phrases)]
+    print(f"[BENCH] Batch encode of {n_phrases} phrases x {n_chars} characters")
+    results = {}
+    for n_jobs in jobs:
+        with tempfile.TemporaryDirectory() as output_dir:
+            stats = batch_encode(records, output_dir, jobs=n_jobs)
+        results[n_jobs] = {k: stats[k] for k in
+                           ("elapsed", "phrases_per_s", "audio_seconds_per_s")}
+        print(f"  {n_jobs:>2} workers  {stats['phrases_per_s']:8.1f} phrases/s  "
+              f"{stats['audio_seconds_per_s']:8.1f} audio-s/s")
+    return results
+
+def bench_batch_decode(n_files=200, n_chars=40, jobs=None, seed=4):
+    # Corpus decoding throughput and accuracy, inline against a pool over every core
+    jobs = jobs or sorted({1, os.cpu_count()})
+    texts = {f"msg{n:05d}": make_text(n_chars, seed=seed + n) for n in range(n_files)}
+    records = [{'id': key, 'text': text, 'params': {}} for key, text in texts.items()]
+    print(f"[BENCH] Batch decode of {n_files} files x {n_chars} characters")
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus:
+        batch_encode(records, corpus, jobs=1)
+        for n_jobs in jobs:
+            output = os.path.join(corpus, "results.jsonl")
+            stats = batch_decode(corpus, output, jobs=n_jobs)
+            with open(output) as f:
+                decoded = [json.loads(line) for line in f]
+            accuracy = np.mean([
+                text_accuracy(r.get('text', ''),
+                              "".join(texts[os.path.basename(r['file'])[:-4]].split()))
+                for r in decoded])
+            results[n_jobs] = {k: stats[k] for k in
+                               ("elapsed", "files_per_s", "audio_seconds_per_s")}
+            results[n_jobs]["accuracy"] = float(accuracy)
+            print(f"  {n_jobs:>2} workers  {stats['files_per_s']:8.1f} files/s  "
+                  f"{stats['audio_seconds_per_s']:8.1f} audio-s/s  "
+                  f"accuracy {accuracy:.1%}")
+    return results
+
+# Third-party packages the encoder/decoder core may import directly; their
+# own dependencies are nested under them in the -X importtime tree
+CORE_IMPORTS = {'numpy', 'scipy', 'soundfile'}
+DEFERRED_IMPORTS = {'matplotlib', 'sounddevice'}
+
+def _import_tree(statement):
+    # Runs `statement` in a fresh interpreter under -X importtime and returns
+    # (module, cumulative us, direct child modules) for every import
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    modules = []
+    pending = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        children = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append(name.strip())
+        modules.append((name.strip(), int(cumulative), children))
+    return modules
+
+def bench_import_time(repeat=5):
+    # Cold-start cost of `import prototype` and which packages it pulls in.
+    # Fails if anything outside the stdlib and CORE_IMPORTS is imported
+    # directly, or if a deferred GUI/audio package is imported at all.
+    best = None
+    for _ in range(repeat):
+        modules = _import_tree("import prototype")
+        cumulative = dict((name, us) for name, us, _ in modules)["prototype"]
+        best = cumulative if best is None else min(best, cumulative)
+
+    direct = next(children for name, _, children in modules if name == "prototype")
+    packages = {name.split(".")[0] for name in direct}
+    third_party = packages - set(sys.stdlib_module_names)
+    loaded = {name.split(".")[0] for name, _, _ in modules}
+
+    print(f"[BENCH] import prototype: {best / 1e3:.1f} ms, "
+          f"{len(modules)} modules loaded")
+    print(f"  direct third-party imports: {sorted(third_party)}")
+    assert third_party <= CORE_IMPORTS, \
+        f"core imports {sorted(third_party - CORE_IMPORTS)} beyond {sorted(CORE_IMPORTS)}"
+    assert not loaded & DEFERRED_IMPORTS, \
+        f"{sorted(loaded & DEFERRED_IMPORTS)} imported at startup"
+    return {"import_ms": best / 1e3, "modules": len(modules),
+            "third_party": sorted(third_party)}
+
+def bench_instrumentation(n_chars=100, seed=6):
+    # Per-chunk cost of the live pipeline with and without PipelineStats
+    signal = synthesize_phrase(make_text(n_chars, seed=seed))
+    signal /= np.max(np.abs(signal)) + 1e-9
+    print(f"[BENCH] Pipeline instrumentation overhead, {n_chars} characters")
+    results = {}
+    for detector in DETECTORS:
+        plain = LiveDecoder(detector=detector)
+        timed = LiveDecoder(detector=detector, instrument=True)
+        hop = plain.hop_size
+        blocks = [signal[i:i + hop] for i in range(0, len(signal) - hop + 1, hop)]
+        off = _measure(partial(_live_chunks, plain, blocks), hop / 44100, len(blocks))
+        on = _measure(partial(_live_chunks, timed, blocks), hop / 44100, len(blocks))
+        overhead = on["time_s"] / off["time_s"] - 1
+        results[detector] = {"off_us": off["time_s"] * 1e6,
+                             "on_us": on["time_s"] * 1e6, "overhead": overhead}
+        print(f"  {detector:<9} off {off['time_s'] * 1e6:7.1f} us/chunk  "
+              f"on {on['time_s'] * 1e6:7.1f} us/chunk  ({overhead:+.1%})")
+        print(f"    {timed.pipeline_stats.report(44100)}")
+    return results
+
+def bench_live_sources(n_chars=200, repeat=5, seed=7):
+    # Maximum throughput of the live engine (source thread, ring, decoding
+    # thread) fed by an unthrottled SyntheticSource, against FileDecoder on
+    # the same audio. Needs no audio device.
+    text = make_text(n_chars, seed=seed)
+    expected = "".join(text.split()) * repeat
+    print(f"[BENCH] Live decoder at full speed, {n_chars} characters x {repeat}")
+    results = {}
+    for detector in DETECTORS:
+        source = SyntheticSource(text, repeat=repeat)
+        audio = len(source.signal) * repeat / source.sample_rate
+        decoder = LiveDecoder(detector=detector, source=source, overflow='block')
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            live_text = decoder.start_listening(print_symbols=False)
+        live_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        file_text = FileDecoder(detector=detector).decode_blocks(
+            [np.tile(source.signal, repeat).astype(float)]).text
+        file_time = time.perf_counter() - start
+
+        results[detector] = {
+            "live_x_realtime": audio / live_time,
+            "file_x_realtime": audio / file_time,
+            "live_accuracy": text_accuracy(live_text, expected),
+            "file_accuracy": text_accuracy(file_text, expected),
+            "overruns": decoder.ring.overruns,
+        }
+        r = results[detector]
+        print(f"  {detector:<9} live x{r['live_x_realtime']:6.1f} real time "
+              f"(accuracy {r['live_accuracy']:.1%}, {r['overruns']} overruns)  |  "
+              f"file x{r['file_x_realtime']:6.1f} (accuracy {r['file_accuracy']:.1%})")
+    return results
+
+# Regression suite: fixed cases measured the same way on every run, written
+# to JSON and compared with a baseline file from an earlier run.
+
+def _run_times(fn, repeat, min_time):
+    # Wall time of each run of fn, at least `repeat` runs and `min_time` seconds
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def _summarize(fn, times, audio_seconds, calls):
+    # Median and best time per call, peak traced allocation of one run and
+    # the real-time factor (median time per call / audio seconds per call,
+    # < 1 means faster than real time). The median, unlike the best run,
+    # does not move with one lucky or unlucky run, so it is what gets compared.
+    peak = _peak_alloc_per_call(lambda _: fn(), [None])
+    per_call = float(np.median(times)) / calls
+    return {"time_s": per_call, "best_s": min(times) / calls,
+            "runs": len(times), "peak_bytes": int(peak),
+            "rtf": per_call / audio_seconds}
+
+def _measure(fn, audio_seconds, calls=1, repeat=9, min_time=0.25):
+    # One case measured on its own; fn performs `calls` calls per run and
+    # short cases get as many runs as fit in min_time
+    fn()
+    return _summarize(fn, _run_times(fn, repeat, min_time), audio_seconds, calls)
+
+# Fixed reference workload timed next to the suite cases: its change
+# between two runs is the machine's (shared host, frequency scaling), not
+# the code's, and baselines are rescaled by it before comparing
+_CALIBRATION_SIGNAL = np.random.default_rng(0).normal(0, 0.3, 1 << 16)
+
+def _calibration():
+    spectrum = np.fft.rfft(_CALIBRATION_SIGNAL)
+    filtered = np.fft.irfft(spectrum * np.hanning(len(spectrum)))
+    return sum(float(x) for x in filtered[:2048])
+
+def _tone_cold(char, duration, sample_rate):
+    TONE_CACHE.clear()
+    return generate_tone(char, duration, sample_rate)
+
+def _encode_quiet(text):
+    # encode_phrase into memory: disk writes would time the filesystem
+    output = io.BytesIO()
+    output.name = "suite.wav"
+    with contextlib.redirect_stdout(io.StringIO()):
+        encode_phrase(text, output)
+
+def _live_chunks(decoder, blocks):
+    # What process_audio does per block, minus the thread: ring round trip + feed
+    decoder.reset()
+    for block in blocks:
+        decoder.ring.write(block)
+        decoder.feed(decoder.ring.read(decoder.hop_size))
+
+def suite_cases(quick=False):
+    # Yields (name, fn, audio seconds per call, calls per fn run)
+    rates = (8000, 44100) if quick else (8000, 44100, 48000)
+    lengths = (10, 100) if quick else (10, 100, 1000)
+    seconds = (1, 10) if quick else (1, 10, 60)
+    factors = (2, '7.5', 10)
+
+    for sr in rates:
+        for duration in (0.05, 0.15, 1.0):
+            yield (f"generate_tone/cold/{sr}Hz/{duration}s",
+                   partial(_tone_cold, 'A', duration, sr), duration, 1)
+            yield (f"generate_tone/warm/{sr}Hz/{duration}s",
+                   partial(generate_tone, 'A', duration, sr), duration, 1)
+
+    for n_chars in lengths:
+        text = make_text(n_chars, seed=n_chars)
+        audio_seconds = len(synthesize_phrase(text)) / 44100
+        yield (f"encode_phrase/{n_chars}chars",
+               partial(_encode_quiet, text),
+               audio_seconds, 1)
+
+    signal = synthesize_phrase(make_text(100, seed=5))
+    signal /= np.max(np.abs(signal)) + 1e-9
+    for detector in DETECTORS:
+        decoder = LiveDecoder(detector=detector)
+        hop = decoder.hop_size
+        blocks = [signal[i:i + hop] for i in range(0, len(signal) - hop + 1, hop)]
+        yield (f"live_decoder/{detector}/chunk", partial(_live_chunks, decoder, blocks),
+               hop / decoder.sample_rate, len(blocks))
+
+    # RTF of both transforms is relative to the normal-speed message length
+    rng = np.random.default_rng(0)
+    for sr in rates:
+        for length in seconds:
+            message = rng.normal(0, 0.3, length * sr)
+            for factor in factors:
+                fast = speedup_signal(message, factor)
+                yield (f"speedup_signal/{sr}Hz/{length}s/x{factor}",
+                       partial(speedup_signal, message, factor), length, 1)
+                yield (f"slowdown_signal/{sr}Hz/{length}s/x{factor}",
+                       partial(slowdown_signal, fast, factor), length, 1)
+
+def compare_results(results, baseline, threshold=0.3, min_bytes=65536,
+                    min_seconds=5e-4, speed=1.0):
+    # (case, metric, baseline, current) for every case whose time or peak
+    # memory grew by more than `threshold`. Growth below min_seconds or
+    # min_bytes is ignored: scheduler jitter and small allocations are noisy.
+    # Baseline times are first multiplied by `speed`, how much slower the
+    # machine ran the calibration workload this time.
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        expected = previous["time_s"] * speed
+        if (current["time_s"] > expected * (1 + threshold)
+                and current["time_s"] - expected >= min_seconds):
+            regressions.append((name, "time_s", expected, current["time_s"]))
+        if (current["peak_bytes"] > previous["peak_bytes"] * (1 + threshold)
+                and current["peak_bytes"] - previous["peak_bytes"] >= min_bytes):
+            regressions.append((name, "peak_bytes", previous["peak_bytes"],
+                                current["peak_bytes"]))
+    return regressions
+
+def run_suite(output="bench_results.json", baseline="bench_baseline.json",
+              threshold=0.3, quick=False, save_baseline=False, rounds=5,
+              min_time=0.25):
+    # Measures every suite case, writes them to `output` and compares them
+    # with `baseline` if it exists. Returns the regressions found. Each case
+    # is timed in `rounds` slices spread over the whole suite, so a slow
+    # spell of the machine only touches part of any case's runs.
+    print(f"[BENCH] Regression suite{' (quick)' if quick else ''}")
+    cases = list(suite_cases(quick))
+    times = {name: [] for name, _, _, _ in cases}
+    calibration = []
+    for name, fn, _, _ in cases:
+        fn()
+    for _ in range(rounds):
+        for name, fn, _, _ in cases:
+            times[name].extend(_run_times(fn, 2, min_time / rounds))
+            calibration.extend(_run_times(_calibration, 1, 0))
+
+    results = {}
+    for name, fn, audio_seconds, calls in cases:
+        r = results[name] = _summarize(fn, times[name], audio_seconds, calls)
+        print(f"  {name:<40} {r['time_s'] * 1e3:9.3f} ms  "
+              f"peak {r['peak_bytes'] / 1024:9.1f} KiB  RTF {r['rtf']:.4f}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "calibration_s": float(np.median(calibration)),
+        },
+        "results": results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"[BENCH] Results written to '{output}'")
+
+    regressions = []
+    if baseline and os.path.exists(baseline):
+        with open(baseline) as f:
+            reference = json.load(f)
+        speed = 1.0
+        if "calibration_s" in reference["meta"]:
+            speed = report["meta"]["calibration_s"] / reference["meta"]["calibration_s"]
+            print(f"[BENCH] Machine speed against the baseline: x{1 / speed:.2f} "
+                  f"(calibration workload)")
+        regressions = compare_results(results, reference["results"], threshold,
+                                      speed=speed)
+        for name, metric, previous, current in regressions:
+            print(f"[BENCH] REGRESSION {name} {metric}: {previous:.4g} -> "
+                  f"{current:.4g} (x{current / previous:.2f})")
+        print(f"[BENCH] {len(regressions)} regressions against '{baseline}' "
+              f"(threshold +{threshold:.0%})")
+    if save_baseline and baseline:
+        with open(baseline, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"[BENCH] Baseline saved to '{baseline}'")
+    return regressions
+
+def run_all():
+    bench_import_time()
+    bench_detectors()
+    bench_fft_chunk()
+    bench_bandpass()
+    bench_encoders()
+    bench_compressed_encode()
+    bench_compressed_decode()
+    bench_speed_factors()
+    bench_multichannel()
+    bench_batch_encode()
+    bench_batch_decode()
+    bench_instrumentation()
+    bench_live_sources()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Without options, runs every benchmark. --suite runs the "
+                    "regression suite instead.")
+    parser.add_argument('--suite', action='store_true')
+    parser.add_argument('--output', default="bench_results.json")
+    parser.add_argument('--baseline', default="bench_baseline.json")
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help="relative slowdown/growth flagged as a regression")
+    parser.add_argument('--quick', action='store_true', help="fewer suite cases")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="also store these results as the baseline")
+    args = parser.parse_args(argv)
+    if not args.suite:
+        run_all()
+        return 0
+    regressions = run_suite(args.output, args.baseline, args.threshold,
+                            args.quick, args.save_baseline)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
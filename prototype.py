@@ -1,299 +1,2579 @@
-import numpy as np
-import soundfile as sf
-import matplotlib.pyplot as plt
-import sounddevice as sd
-from scipy.signal import find_peaks, butter, filtfilt, get_window, resample_poly
-import queue
-import threading
-from datetime import datetime
-
-# Frequencies used for DTMF encoding/decoding
-FREQS_LOW = [697, 770, 852, 941, 1033, 1125, 1218]
-FREQS_HIGH = [1336, 1477, 1633, 1785, 1944]
-
-# Character matrix mapping frequencies to symbols
-EXTENDED_MATRIX = [
-    ['A', 'B', 'C', 'D', 'E'],
-    ['F', 'G', 'H', 'I', 'J'],
-    ['K', 'L', 'M', 'N', 'O'],
-    ['P', 'Q', 'R', 'S', 'T'],
-    ['U', 'V', 'W', 'X', 'Y'],
-    ['Z', '0', '1', '2', '3'],
-    ['4', '5', '6', '7', '8']
-]
-
-def find_frequencies(char):
-    for i, row in enumerate(EXTENDED_MATRIX):
-        if char in row:
-            return FREQS_LOW[i], FREQS_HIGH[row.index(char)]
-    return None
-
-def generate_tone(char, duration=0.2, sample_rate=44100):
-    # Generates a DTMF tone by combining two sine waves at specific frequencies
-    freqs = find_frequencies(char)
-    if not freqs:
-        return np.zeros(int(sample_rate * duration))
-
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    sig_low = np.sin(2 * np.pi * freqs[0] * t)
-    sig_high = np.sin(2 * np.pi * freqs[1] * t)
-    signal = 0.5 * sig_low + 0.5 * sig_high
-
-    # Apply fade in/out to avoid clicks
-    fade_len = int(sample_rate * 0.01)
-    if fade_len > 0 and len(signal) > 2*fade_len:
-        fade_in = np.linspace(0, 1, fade_len)
-        fade_out = fade_in[::-1]
-        signal[:fade_len] *= fade_in
-        signal[-fade_len:] *= fade_out
-
-    # Normalize amplitude
-    max_amp = np.max(np.abs(signal)) + 1e-9
-    signal /= max_amp
-    return signal
-
-def encode_phrase(phrase, output_wav="encoded_phrase.wav",
-                  char_duration=0.15, gap_duration=0.3):
-    # Converts text to DTMF audio by generating tones for each character
-    sr = 44100
-    signals = []
-    gap = np.zeros(int(sr * gap_duration))
-
-    for char in phrase.upper():
-        if char.isspace():
-            signals.append(gap)
-        else:
-            tone = generate_tone(char, duration=char_duration, sample_rate=sr)
-            signals.append(tone)
-            signals.append(gap)
-
-    final_signal = np.concatenate(signals)
-    final_signal /= (np.max(np.abs(final_signal)) + 1e-9)
-
-    sf.write(output_wav, final_signal, sr)
-    print(f"[ENCODE] Phrase encoded into '{output_wav}'")
-
-# Matrix used for decoding matches encoding matrix
-DTMF_MATRIX = EXTENDED_MATRIX
-
-def butter_bandpass(lowcut, highcut, fs, order=5):
-    # Creates a Butterworth bandpass filter
-    from scipy.signal import butter
-    nyq = 0.5 * fs
-    low = lowcut / nyq
-    high = highcut / nyq
-    b, a = butter(order, [low, high], btype='band')
-    return b, a
-
-class LiveDecoder:
-    # Real-time DTMF decoder using microphone input
-    def __init__(self):
-        self.sample_rate = 44100
-        self.chunk_duration = 0.1
-        self.chunk_size = int(self.sample_rate * self.chunk_duration)
-        self.audio_queue = queue.Queue()
-        self.running = False
-
-        self.last_detection_time = datetime.now()
-        self.min_gap = 0.25
-        self.decoded_chars = []
-
-    def audio_callback(self, indata, frames, time, status):
-        if status:
-            print(status)
-        self.audio_queue.put(indata.copy())
-
-    def process_audio(self):
-        while self.running:
-            try:
-                chunk = self.audio_queue.get().flatten()
-                if np.max(np.abs(chunk)) < 0.01:
-                    continue
-
-                # Filter and process audio chunk
-                b, a = butter_bandpass(600, 2000, self.sample_rate)
-                filtered_chunk = filtfilt(b, a, chunk)
-
-                window = np.hanning(len(filtered_chunk))
-                windowed = filtered_chunk * window
-                fft_result = np.abs(np.fft.fft(windowed))
-                freqs = np.fft.fftfreq(len(windowed), 1/self.sample_rate)
-
-                pos_mask = freqs > 0
-                freqs = freqs[pos_mask]
-                fft_result = fft_result[pos_mask]
-
-                # Detect frequency peaks
-                peaks, props = find_peaks(fft_result,
-                                          height=np.max(fft_result)*0.2,
-                                          distance=30,
-                                          prominence=0.1)
-
-                detected_freqs = freqs[peaks]
-                peak_heights = props['peak_heights']
-
-                # Match detected frequencies to DTMF tones
-                low_candidates = []
-                high_candidates = []
-                tol = 40
-
-                for freq_val, amp_val in zip(detected_freqs, peak_heights):
-                    for i, f_l in enumerate(FREQS_LOW):
-                        if abs(freq_val - f_l) < tol:
-                            low_candidates.append((i, amp_val))
-                    for j, f_h in enumerate(FREQS_HIGH):
-                        if abs(freq_val - f_h) < tol:
-                            high_candidates.append((j, amp_val))
-
-                # Validate and decode detected frequencies
-                if len(low_candidates) == 1 and len(high_candidates) == 1:
-                    low_idx, low_amp = low_candidates[0]
-                    high_idx, high_amp = high_candidates[0]
-
-                    ratio_amp = min(low_amp, high_amp) / max(low_amp, high_amp)
-                    if ratio_amp > 0.2:
-                        current_time = datetime.now()
-                        dt = (current_time - self.last_detection_time).total_seconds()
-                        if dt >= self.min_gap:
-                            detected_char = DTMF_MATRIX[low_idx][high_idx]
-                            self.decoded_chars.append(detected_char)
-                            self.last_detection_time = current_time
-                            print(f"Detected char: {detected_char}")
-                            print("Text so far:", "".join(self.decoded_chars))
-            except queue.Empty:
-                continue
-
-    def start_listening(self):
-        self.running = True
-        self.decoded_chars = []
-
-        processing_thread = threading.Thread(target=self.process_audio)
-        processing_thread.start()
-
-        print("Live DTMF decoding started. Press Ctrl+C to stop.")
-        try:
-            with sd.InputStream(callback=self.audio_callback,
-                                channels=1,
-                                samplerate=self.sample_rate,
-                                blocksize=self.chunk_size):
-                while self.running:
-                    sd.sleep(100)
-        except KeyboardInterrupt:
-            print("\nStopping live decoding...")
-
-        self.running = False
-        processing_thread.join()
-        print("Final decoded text (live):", "".join(self.decoded_chars))
-
-def speedup_signal(signal, factor):
-    # Accelerates audio by downsampling with anti-aliasing filter
-    fast_signal = resample_poly(signal, up=1, down=factor)
-    return fast_signal
-
-def slowdown_signal(signal, factor):
-    # Decelerates audio by upsampling with anti-imaging filter
-    slow_signal = resample_poly(signal, up=factor, down=1)
-    return slow_signal
-
-def test_speed_transform(input_file, speed_factor=10):
-    # Tests speed transformation by accelerating then decelerating
-    audio, sr = sf.read(input_file)
-    if audio.ndim > 1:
-        audio = audio[:, 0]
-
-    print(f"[SPEED TEST] Reading '{input_file}' @ {sr} Hz")
-
-    print(f"Accelerating x{speed_factor}...")
-    fast = speedup_signal(audio, speed_factor)
-    fast_file = f"fast_{input_file}"
-    sf.write(fast_file, fast, sr)
-    print(f"Fast version saved to {fast_file}")
-
-    print(f"Slowing down x{speed_factor} (to original duration approx.)...")
-    restored = slowdown_signal(fast, speed_factor)
-    restored_file = f"restored_{input_file}"
-    sf.write(restored_file, restored, sr)
-    print(f"Restored version saved to {restored_file}")
-
-    # Visualize results
-    plt.figure(figsize=(10, 6))
-    plt.subplot(311)
-    plt.title("Original (first 1000 samples)")
-    plt.plot(audio[:1000])
-
-    plt.subplot(312)
-    plt.title(f"Accelerated x{speed_factor} (first 1000 samples)")
-    plt.plot(fast[:1000])
-
-    plt.subplot(313)
-    plt.title("Restored (first 1000 samples)")
-    plt.plot(restored[:1000])
-    plt.tight_layout()
-    plt.show()
-
-    print(f"Original length : {len(audio)} samples")
-    print(f"Fast length     : {len(fast)} samples")
-    print(f"Restored length : {len(restored)} samples")
-
-    if len(restored) == len(audio):
-        diff = np.max(np.abs(audio - restored))
-        print(f"Max difference: {diff:.4f}")
-    else:
-        print("Note: The length differs from the original. Some mismatch is normal.")
-
-def main():
-    print("=== DTMF All-In-One ===")
-    while True:
-        print("\nOptions:")
-        print("1) Encode phrase to DTMF (WAV)")
-        print("2) Start live DTMF decoder (micro)")
-        print("3) Test speed transform (accelerate/decelerate) a WAV file")
-        print("4) Slow down an accelerated file")
-        print("5) Quit")
-        choice = input("Choose an option: ").strip()
-
-        if choice == "1":
-            phrase = input("Enter the phrase to encode: ")
-            out_file = input("Output file (e.g. 'my_encoded.wav') [default=encoded_phrase.wav]: ") or "encoded_phrase.wav"
-            encode_phrase(phrase, out_file)
-        elif choice == "2":
-            print("Starting live DTMF decoder...")
-            decoder = LiveDecoder()
-            decoder.start_listening()
-        elif choice == "3":
-            in_file = input("Which WAV file to transform?: ").strip()
-            if not in_file:
-                print("Invalid file!")
-                continue
-            fac_str = input("Acceleration factor (integer) [default=10]: ").strip()
-            if not fac_str.isdigit():
-                fac_str = "10"
-            speed_fac = int(fac_str)
-            test_speed_transform(in_file, speed_fac)
-        elif choice == "4":
-            in_file = input("Which WAV file to slow down?: ").strip()
-            if not in_file:
-                print("Invalid file!")
-                continue
-            fac_str = input("Slowdown factor (integer) [default=10]: ").strip()
-            if not fac_str.isdigit():
-                fac_str = "10"
-            speed_fac = int(fac_str)
-            
-            audio, sr = sf.read(in_file)
-            if audio.ndim > 1:
-                audio = audio[:, 0]
-            
-            print(f"Slowing down x{speed_fac}...")
-            slowed = slowdown_signal(audio, speed_fac)
-            slow_file = f"slowed_{in_file}"
-            sf.write(slow_file, slowed, sr)
-            print(f"Slowed version saved to {slow_file}")
-        elif choice == "5":
-            print("Exiting program.")
-            break
-        else:
-            print("Invalid choice. Please enter 1-5.")
-
-if __name__ == "__main__":
-    main()
+import numpy as np
+import soundfile as sf
+from scipy.signal import (find_peaks, butter, get_window, resample_poly,
+                          sosfilt, sosfilt_zi, firwin, freqz, upfirdn)
+import argparse
+import asyncio
+import contextlib
+import csv
+import glob
+import io
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from functools import partial
+
+# Frequencies used for DTMF encoding/decoding
+FREQS_LOW = [697, 770, 852, 941, 1033, 1125, 1218]
+FREQS_HIGH = [1336, 1477, 1633, 1785, 1944]
+
+# Character matrix mapping frequencies to symbols
+EXTENDED_MATRIX = [
+    ['A', 'B', 'C', 'D', 'E'],
+    ['F', 'G', 'H', 'I', 'J'],
+    ['K', 'L', 'M', 'N', 'O'],
+    ['P', 'Q', 'R', 'S', 'T'],
+    ['U', 'V', 'W', 'X', 'Y'],
+    ['Z', '0', '1', '2', '3'],
+    ['4', '5', '6', '7', '8']
+]
+
+class SymbolTable:
+    # Two-way lookup between symbols and their (f_low, f_high, row, col),
+    # compiled once from the frequency plan. Symbol index = row * n_cols + col.
+    SPACE = -2
+    UNKNOWN = -1
+
+    def __init__(self, freqs_low, freqs_high, matrix):
+        self.n_rows = len(freqs_low)
+        self.n_cols = len(freqs_high)
+        self.symbols = [char for row in matrix for char in row]
+        self.by_symbol = {}
+        self.index_of = {}
+        for row, chars in enumerate(matrix):
+            for col, char in enumerate(chars):
+                self.by_symbol[char] = (freqs_low[row], freqs_high[col], row, col)
+                self.index_of[char] = row * self.n_cols + col
+
+        # Per-index arrays for vectorized synthesis
+        index = np.arange(len(self.symbols))
+        self.rows = index // self.n_cols
+        self.cols = index % self.n_cols
+        self.low_freqs = np.asarray(freqs_low, dtype=float)[self.rows]
+        self.high_freqs = np.asarray(freqs_high, dtype=float)[self.cols]
+
+        # ASCII code -> symbol index, whitespace -> SPACE
+        self._ascii = np.full(128, self.UNKNOWN, dtype=np.int16)
+        for code in range(128):
+            if chr(code).isspace():
+                self._ascii[code] = self.SPACE
+        for char, idx in self.index_of.items():
+            if ord(char) < 128:
+                self._ascii[ord(char)] = idx
+
+    def lookup(self, char):
+        # (f_low, f_high, row, col) for a symbol, None if it has no tone
+        return self.by_symbol.get(char)
+
+    def symbol(self, row, col):
+        return self.symbols[row * self.n_cols + col]
+
+    def to_indices(self, text):
+        # Text -> int16 symbol indices (SPACE / UNKNOWN for the rest), uppercased
+        codes = np.frombuffer(text.upper().encode('utf-32-le'), dtype=np.uint32)
+        indices = np.full(len(codes), self.UNKNOWN, dtype=np.int16)
+        ascii_mask = codes < 128
+        indices[ascii_mask] = self._ascii[codes[ascii_mask]]
+        if not ascii_mask.all():
+            for code in np.unique(codes[~ascii_mask]):
+                char = chr(code)
+                if char.isspace():
+                    indices[codes == code] = self.SPACE
+                elif char in self.index_of:
+                    indices[codes == code] = self.index_of[char]
+        return indices
+
+SYMBOLS = SymbolTable(FREQS_LOW, FREQS_HIGH, EXTENDED_MATRIX)
+
+def find_frequencies(char):
+    entry = SYMBOLS.lookup(char)
+    return entry[:2] if entry else None
+
+def _synthesize_tone(char, duration, sample_rate, fade_duration, dtype):
+    # Generates a DTMF tone by combining two sine waves at specific frequencies
+    freqs = find_frequencies(char)
+    if not freqs:
+        return np.zeros(int(sample_rate * duration), dtype=dtype)
+
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    sig_low = np.sin(2 * np.pi * freqs[0] * t)
+    sig_high = np.sin(2 * np.pi * freqs[1] * t)
+    signal = 0.5 * sig_low + 0.5 * sig_high
+
+    # Apply fade in/out to avoid clicks
+    fade_len = int(sample_rate * fade_duration)
+    if fade_len > 0 and len(signal) > 2*fade_len:
+        fade_in = np.linspace(0, 1, fade_len)
+        fade_out = fade_in[::-1]
+        signal[:fade_len] *= fade_in
+        signal[-fade_len:] *= fade_out
+
+    # Normalize amplitude
+    max_amp = np.max(np.abs(signal)) + 1e-9
+    signal /= max_amp
+    return signal.astype(dtype, copy=False)
+
+class ToneCache:
+    # Bounded LRU of tone templates keyed by (symbol, duration, sample rate,
+    # fade, dtype). There are only a few dozen symbols, so encoding long
+    # texts mostly copies precomputed templates.
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._tones = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, char, duration=0.2, sample_rate=44100, fade_duration=0.01,
+            dtype=np.float64):
+        # Returns a shared, read-only template; copy it before modifying
+        key = (char, float(duration), int(sample_rate), float(fade_duration),
+               np.dtype(dtype).str)
+        with self._lock:
+            tone = self._tones.get(key)
+            if tone is not None:
+                self._tones.move_to_end(key)
+                self.hits += 1
+                return tone
+            self.misses += 1
+
+        tone = _synthesize_tone(char, duration, sample_rate, fade_duration, dtype)
+        tone.setflags(write=False)
+        with self._lock:
+            self._tones[key] = tone
+            while len(self._tones) > self.maxsize:
+                self._tones.popitem(last=False)
+        return tone
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._tones),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._tones.clear()
+            self.hits = 0
+            self.misses = 0
+
+TONE_CACHE = ToneCache()
+
+def generate_tone(char, duration=0.2, sample_rate=44100, fade_duration=0.01,
+                  dtype=np.float64):
+    # Generates a DTMF tone (a writable copy of the cached template)
+    return TONE_CACHE.get(char, duration, sample_rate, fade_duration, dtype).copy()
+
+class _SymbolSlots(dict):
+    # Symbol index -> the samples it encodes to (tone then gap, or just the
+    # gap for whitespace), built on first use from the tone cache
+    def __init__(self, char_duration, gap_duration, sample_rate):
+        super().__init__()
+        self.char_duration = char_duration
+        self.sample_rate = sample_rate
+        self.gap = np.zeros(int(sample_rate * gap_duration))
+
+    def __missing__(self, index):
+        if index == SymbolTable.SPACE:
+            slot = self.gap
+        else:
+            char = SYMBOLS.symbols[index] if index >= 0 else None
+            tone = TONE_CACHE.get(char, duration=self.char_duration,
+                                  sample_rate=self.sample_rate)
+            slot = np.concatenate((tone, self.gap))
+        self[index] = slot
+        return slot
+
+def _fade_envelope(k, n_tone, fade_len):
+    # Fade in/out gain at tone sample k, same values as generate_tone's linspace fades
+    if fade_len <= 0 or n_tone <= 2*fade_len:
+        return np.ones(np.shape(k))
+    edge = np.minimum(k, (n_tone - 1) - k)
+    step = 1.0 / (fade_len - 1) if fade_len > 1 else 0.0
+    return np.where(edge < fade_len - 1, edge * step, 1.0)
+
+def _synthesize_vectorized(indices, char_duration, gap_duration, sample_rate,
+                           fade_duration=0.01, block_samples=1 << 20):
+    # Builds the whole phrase from its symbol indices with array operations
+    # only. The distinct symbols are synthesized together as rows of a
+    # (symbols x tone samples) matrix, their frequencies broadcast against
+    # the tone time axis, with the fade envelope and per-tone normalization
+    # applied to all rows at once. Each character's tone is then gathered
+    # from its row and scattered to its offset in the output. Characters are
+    # handled in blocks of about block_samples samples to bound temporaries.
+    n_tone = int(sample_rate * char_duration)
+    n_gap = int(sample_rate * gap_duration)
+    fade_len = int(sample_rate * fade_duration)
+
+    indices = np.asarray(indices, dtype=np.int64)
+    seg_len = np.where(indices == SymbolTable.SPACE, n_gap, n_tone + n_gap)
+    ends = np.cumsum(seg_len)
+    out = np.zeros(int(ends[-1]) if len(ends) else 0)
+
+    known = indices >= 0
+    if not n_tone or not known.any():
+        return out
+    symbols = indices[known]
+    starts = (ends - seg_len)[known]
+
+    k = np.arange(n_tone)
+    t = k * (char_duration / n_tone)
+    used, rows = np.unique(symbols, return_inverse=True)
+    tones = (0.5 * np.sin(2 * np.pi * SYMBOLS.low_freqs[used][:, None] * t)
+             + 0.5 * np.sin(2 * np.pi * SYMBOLS.high_freqs[used][:, None] * t))
+    tones *= _fade_envelope(k, n_tone, fade_len)
+    tones /= np.max(np.abs(tones), axis=1, keepdims=True) + 1e-9
+
+    per_block = max(1, block_samples // n_tone)
+    for first in range(0, len(symbols), per_block):
+        block = slice(first, first + per_block)
+        out[starts[block, None] + k] = tones[rows[block]]
+    return out
+
+def _decimation_gain(freqs, sample_rate, ratio):
+    # Magnitude response of resample_poly's default anti-aliasing filter for
+    # a speed-up by ratio (up = denominator, down = numerator) at freqs (Hz)
+    up, down = ratio.denominator, ratio.numerator
+    h = FILTER_CACHE.polyphase(up, down)
+    _, response = freqz(h, worN=2 * np.pi * np.asarray(freqs) / (sample_rate * up))
+    return np.abs(response)
+
+def _synthesize_compressed(indices, char_duration, gap_duration, sample_rate,
+                           compression, fade_duration=0.01, block_samples=1 << 20):
+    # Synthesizes the phrase already time-compressed by `compression`:
+    # output sample n is the normal-speed signal evaluated at sample
+    # n * compression, which is the same as playing tones `compression`
+    # times higher for 1/compression of the time. Only the kept samples are
+    # computed. Each tone component is scaled by the anti-aliasing filter
+    # response of speedup_signal, so components pushed past its cutoff
+    # vanish exactly as they would after decimation.
+    ratio = Fraction(*speed_ratio(compression))
+    n_tone = int(sample_rate * char_duration)
+    n_gap = int(sample_rate * gap_duration)
+    fade_len = int(sample_rate * fade_duration)
+    step = char_duration / n_tone if n_tone else 0.0
+
+    indices = np.asarray(indices, dtype=np.int64)
+    seg_len = np.where(indices == SymbolTable.SPACE, n_gap, n_tone + n_gap)
+    ends = np.cumsum(seg_len)
+    total = int(ends[-1]) if len(ends) else 0
+    # Same length as resample_poly(signal, ratio.denominator, ratio.numerator)
+    n_out = -(-total * ratio.denominator // ratio.numerator)
+    out = np.zeros(n_out)
+
+    known = indices >= 0
+    if not n_tone or not known.any():
+        return out
+    symbols = indices[known]
+    starts = (ends - seg_len)[known]
+
+    # Per-symbol normalization of the normal-speed tones
+    k = np.arange(n_tone)
+    used, rows = np.unique(symbols, return_inverse=True)
+    low = SYMBOLS.low_freqs[used]
+    high = SYMBOLS.high_freqs[used]
+    full = (0.5 * np.sin(2 * np.pi * low[:, None] * (k * step))
+            + 0.5 * np.sin(2 * np.pi * high[:, None] * (k * step)))
+    full *= _fade_envelope(k, n_tone, fade_len)
+    norm = np.max(np.abs(full), axis=1) + 1e-9
+
+    # Each component keeps the amplitude speedup_signal's lowpass leaves it
+    low_gain = 0.5 * _decimation_gain(low, sample_rate, ratio)
+    high_gain = 0.5 * _decimation_gain(high, sample_rate, ratio)
+
+    # Each tone covers at most this many output samples
+    j = np.arange(-(-n_tone * ratio.denominator // ratio.numerator) + 1)
+    per_block = max(1, block_samples // len(j))
+    for first in range(0, len(symbols), per_block):
+        block = slice(first, first + per_block)
+        r = rows[block][:, None]
+        start = starts[block][:, None]
+        n = -(-start * ratio.denominator // ratio.numerator) + j
+        pos = n * ratio.numerator / ratio.denominator - start
+        valid = (pos < n_tone) & (n < n_out)
+
+        t = pos * step
+        tone = (low_gain[r] * np.sin(2 * np.pi * low[r] * t)
+                + high_gain[r] * np.sin(2 * np.pi * high[r] * t))
+        tone *= _fade_envelope(pos, n_tone, fade_len)
+        tone /= norm[r]
+        out[n[valid]] = tone[valid]
+    return out
+
+ENCODE_METHODS = ('cached', 'vectorized')
+
+def synthesize_phrase(phrase, char_duration=0.15, gap_duration=0.3,
+                      sample_rate=44100, method='cached', compression=1):
+    # Returns the phrase signal before the global normalization.
+    # 'cached' joins cached tone templates per character, 'vectorized'
+    # computes all samples in one NumPy pass with no per-character work.
+    # compression > 1 synthesizes the time-compressed signal directly
+    # (always vectorized), instead of encoding then calling speedup_signal.
+    indices = SYMBOLS.to_indices(phrase)
+    if compression != 1:
+        return _synthesize_compressed(indices, char_duration, gap_duration,
+                                      sample_rate, compression)
+    if method == 'vectorized':
+        return _synthesize_vectorized(indices, char_duration, gap_duration,
+                                      sample_rate)
+    if method != 'cached':
+        raise ValueError(f"Unknown encode method '{method}', "
+                         f"choose from {ENCODE_METHODS}")
+    slots = _SymbolSlots(char_duration, gap_duration, sample_rate)
+    return np.concatenate([slots[i] for i in indices.tolist()])
+
+def encode_phrase(phrase, output_wav="encoded_phrase.wav",
+                  char_duration=0.15, gap_duration=0.3, method='cached',
+                  compression=1):
+    # Converts text to DTMF audio by generating tones for each character,
+    # optionally already accelerated by `compression`
+    sr = 44100
+    final_signal = synthesize_phrase(phrase, char_duration, gap_duration, sr,
+                                     method=method, compression=compression)
+    final_signal /= (np.max(np.abs(final_signal)) + 1e-9)
+
+    sf.write(output_wav, final_signal, sr)
+    print(f"[ENCODE] Phrase encoded into '{getattr(output_wav, 'name', output_wav)}'")
+    if method == 'cached' and compression == 1:
+        # Each distinct symbol is built once per phrase, every repeat reuses it
+        indices = SYMBOLS.to_indices(phrase)
+        indices = indices[indices != SymbolTable.SPACE]
+        distinct = len(np.unique(indices))
+        reuse = 1 - distinct / len(indices) if len(indices) else 0.0
+        print(f"[ENCODE] Tone templates: {distinct} for {len(indices)} "
+              f"characters (reuse {reuse:.1%})")
+
+class _BlockWriter:
+    # Collects samples into a fixed block and writes full blocks to a SoundFile
+    def __init__(self, sound_file, blocksize):
+        self.sound_file = sound_file
+        self.block = np.empty(blocksize)
+        self.fill = 0
+        self.frames = 0
+
+    def write(self, samples):
+        while len(samples):
+            n = min(len(samples), len(self.block) - self.fill)
+            self.block[self.fill:self.fill + n] = samples[:n]
+            self.fill += n
+            samples = samples[n:]
+            if self.fill == len(self.block):
+                self.flush()
+
+    def flush(self):
+        if self.fill:
+            self.sound_file.write(self.block[:self.fill])
+            self.frames += self.fill
+            self.fill = 0
+
+def encode_stream(texts, output_wav="encoded_phrase.wav", char_duration=0.15,
+                  gap_duration=0.3, blocksize=65536):
+    # Encodes an iterable of text pieces straight to disk, one block at a
+    # time, so memory does not grow with the message. Tones are already
+    # normalized, so the output matches encode_phrase for the same text.
+    sr = 44100
+    slots = _SymbolSlots(char_duration, gap_duration, sr)
+    n_chars = 0
+
+    with sf.SoundFile(output_wav, 'w', samplerate=sr, channels=1) as f:
+        writer = _BlockWriter(f, blocksize)
+        for text in texts:
+            indices = SYMBOLS.to_indices(text)
+            for i in indices.tolist():
+                writer.write(slots[i])
+            n_chars += len(indices)
+        writer.flush()
+
+    print(f"[ENCODE] Streamed {n_chars} characters "
+          f"({writer.frames / sr:.1f}s) into '{getattr(output_wav, 'name', output_wav)}'")
+    return writer.frames
+
+def encode_text_file(text_file, output_wav="encoded_phrase.wav",
+                     char_duration=0.15, gap_duration=0.3, read_size=65536):
+    # Streams the contents of a text file through encode_stream
+    with open(text_file, encoding="utf-8") as f:
+        pieces = iter(lambda: f.read(read_size), "")
+        return encode_stream(pieces, output_wav, char_duration, gap_duration)
+
+def _manifest_rows(path):
+    # Raw records of a CSV (with header) or JSONL manifest, as dicts
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+# Per-phrase parameters a manifest may set, with their parsers
+ENCODE_PARAMS = {
+    'char_duration': float,
+    'gap_duration': float,
+    'method': str,
+    'compression': lambda value: Fraction(*speed_ratio(value)),
+}
+
+def _check_record_ids(records, source):
+    # Ids become output file names: each must be unique and a plain name,
+    # so no record can write outside output_dir or over another one
+    seen = set()
+    for record in records:
+        record_id = record['id']
+        if not record_id or any(sep in record_id for sep in ('/', '\\', '\0')):
+            raise ValueError(f"{source}: record id '{record_id}' is not a "
+                             f"valid file name")
+        if record_id in seen:
+            raise ValueError(f"{source}: duplicate record id '{record_id}'")
+        seen.add(record_id)
+
+def read_encode_manifest(path):
+    # Manifest -> [{'id', 'text', 'params'}]. CSV needs id,text columns plus
+    # optional parameter columns; JSONL objects may also nest them in "params".
+    # Ids must be unique file names (see _check_record_ids). Parameter values
+    # are parsed per record when encoding, so a bad value fails that record only.
+    records = []
+    for n, row in enumerate(_manifest_rows(path)):
+        row = dict(row)
+        params = dict(row.pop('params', None) or {})
+        record_id = str(row.pop('id', None) or n)
+        text = row.pop('text', None)
+        if text is None:
+            raise ValueError(f"{path}: record '{record_id}' has no text")
+        params.update((k, v) for k, v in row.items() if v not in (None, ''))
+        unknown = set(params) - set(ENCODE_PARAMS)
+        if unknown:
+            raise ValueError(f"{path}: record '{record_id}' has unknown "
+                             f"parameters {sorted(unknown)}")
+        records.append({'id': record_id, 'text': text, 'params': params})
+    _check_record_ids(records, path)
+    return records
+
+def _init_encode_worker(char_duration, sample_rate):
+    # Pool initializer: warms this process's tone cache with every symbol
+    # at the batch defaults, so no task pays for tone synthesis
+    for char in SYMBOLS.symbols + [None]:
+        TONE_CACHE.get(char, duration=char_duration, sample_rate=sample_rate)
+
+def _parse_encode_params(params):
+    # Applies the ENCODE_PARAMS parsers, any bad value as a ValueError
+    parsed = {}
+    for name, value in params.items():
+        try:
+            parsed[name] = ENCODE_PARAMS[name](value)
+        except (TypeError, ValueError, ZeroDivisionError) as exc:
+            raise ValueError(f"invalid {name} {value!r}: {exc}") from None
+    return parsed
+
+def _encode_chunk(records, output_dir, defaults):
+    # Worker task: encodes a chunk of records, returns (id, path, frames,
+    # error) each. A record that cannot be encoded or written gets an error
+    # message and no path instead of failing the whole batch.
+    sr = 44100
+    outputs = []
+    for record in records:
+        path = os.path.join(output_dir, f"{record['id']}.wav")
+        try:
+            params = dict(defaults, **_parse_encode_params(record['params']))
+            if not record['text']:
+                raise ValueError("empty text")
+            signal = synthesize_phrase(record['text'], params['char_duration'],
+                                       params['gap_duration'], sr,
+                                       method=params['method'],
+                                       compression=params['compression'])
+            signal /= (np.max(np.abs(signal)) + 1e-9)
+            sf.write(path, signal, sr)
+        except (RuntimeError, ValueError, OSError) as exc:
+            outputs.append((record['id'], None, 0, str(exc)))
+            continue
+        outputs.append((record['id'], path, len(signal), None))
+    return outputs
+
+def batch_encode(manifest, output_dir, jobs=None, chunksize=64,
+                 char_duration=0.15, gap_duration=0.3, method='cached',
+                 compression=1):
+    # Encodes every manifest record (a path or a list of records as returned
+    # by read_encode_manifest) to output_dir/<id>.wav over a process pool.
+    # Records go to the workers in chunks of `chunksize` to amortize IPC;
+    # per-record params override the defaults given here. jobs=1 runs inline.
+    # Records that fail are listed under "errors" as (id, message).
+    sr = 44100
+    if isinstance(manifest, str):
+        records = read_encode_manifest(manifest)
+    else:
+        records = list(manifest)
+        _check_record_ids(records, "batch_encode")
+    os.makedirs(output_dir, exist_ok=True)
+    defaults = {'char_duration': char_duration, 'gap_duration': gap_duration,
+                'method': method, 'compression': compression}
+    chunks = [records[i:i + chunksize] for i in range(0, len(records), chunksize)]
+    encode = partial(_encode_chunk, output_dir=output_dir, defaults=defaults)
+    jobs = jobs or os.cpu_count()
+
+    start = time.perf_counter()
+    if jobs == 1:
+        _init_encode_worker(char_duration, sr)
+        results = [out for chunk in chunks for out in encode(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_encode_worker,
+                                 initargs=(char_duration, sr)) as pool:
+            results = [out for chunk_out in pool.map(encode, chunks)
+                       for out in chunk_out]
+    elapsed = time.perf_counter() - start
+
+    outputs = [(record_id, path, frames)
+               for record_id, path, frames, error in results if error is None]
+    errors = [(record_id, error)
+              for record_id, _, _, error in results if error is not None]
+    for record_id, error in errors:
+        print(f"[ENCODE] Record '{record_id}' failed: {error}")
+    audio_seconds = sum(frames for _, _, frames in outputs) / sr
+    stats = {
+        "phrases": len(outputs),
+        "errors": errors,
+        "audio_seconds": audio_seconds,
+        "elapsed": elapsed,
+        "phrases_per_s": len(outputs) / elapsed if elapsed else 0.0,
+        "audio_seconds_per_s": audio_seconds / elapsed if elapsed else 0.0,
+        "jobs": jobs,
+        "outputs": outputs,
+    }
+    print(f"[ENCODE] Batch: {len(outputs)} phrases ({audio_seconds:.1f}s of audio, "
+          f"{len(errors)} errors) in {elapsed:.2f}s with {jobs} workers: "
+          f"{stats['phrases_per_s']:.1f} phrases/s, "
+          f"{stats['audio_seconds_per_s']:.1f} audio-s/s")
+    return stats
+
+# Matrix used for decoding matches encoding matrix
+DTMF_MATRIX = EXTENDED_MATRIX
+
+class FilterDesignCache:
+    # Memoizes filter designs so repeated callers share one set of coefficients
+    def __init__(self):
+        self._designs = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, design):
+        with self._lock:
+            coeffs = self._designs.get(key)
+            if coeffs is not None:
+                self.hits += 1
+                return coeffs
+            self.misses += 1
+
+        coeffs = design()
+        # Cached arrays are shared between callers, so freeze them
+        if isinstance(coeffs, tuple):
+            for arr in coeffs:
+                arr.setflags(write=False)
+        else:
+            coeffs.setflags(write=False)
+
+        with self._lock:
+            return self._designs.setdefault(key, coeffs)
+
+    def bandpass(self, lowcut, highcut, fs, order=5, output='ba'):
+        # Butterworth bandpass keyed by band edges, order, sample rate and output form
+        key = ('butter_bandpass', float(lowcut), float(highcut), float(fs),
+               int(order), output)
+
+        def design():
+            nyq = 0.5 * fs
+            return butter(order, [lowcut / nyq, highcut / nyq],
+                          btype='band', output=output)
+
+        return self._lookup(key, design)
+
+    def polyphase(self, up, down):
+        # resample_poly's default Kaiser lowpass for a reduced up/down pair,
+        # before its scaling by up (resample_poly applies that itself)
+        key = ('polyphase', int(up), int(down))
+
+        def design():
+            max_rate = max(up, down)
+            return firwin(2 * 10 * max_rate + 1, 1. / max_rate,
+                          window=('kaiser', 5.0))
+
+        return self._lookup(key, design)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._designs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._designs.clear()
+            self.hits = 0
+            self.misses = 0
+
+FILTER_CACHE = FilterDesignCache()
+
+def butter_bandpass(lowcut, highcut, fs, order=5, output='ba'):
+    # Creates a Butterworth bandpass filter (cached, see FILTER_CACHE)
+    return FILTER_CACHE.bandpass(lowcut, highcut, fs, order, output)
+
+class StreamingBandpass:
+    # Causal Butterworth bandpass in second-order sections. The filter state
+    # is carried from one chunk to the next, so consecutive chunks are
+    # filtered exactly as one continuous signal, each sample only once.
+    def __init__(self, lowcut, highcut, fs, order=5):
+        # sosfilt needs a writable buffer, cached designs are read-only
+        self.sos = np.array(butter_bandpass(lowcut, highcut, fs, order,
+                                            output='sos'))
+        self._zi_unit = sosfilt_zi(self.sos)
+        self.reset()
+
+    def reset(self):
+        # Restart from a signal at rest
+        self.zi = np.zeros_like(self._zi_unit)
+
+    # On digital silence the state decays into subnormal floats, which make
+    # sosfilt an order of magnitude slower until the signal returns. The
+    # state is flushed to zero every SUBBLOCK samples, so a long block does
+    # not run a whole silent gap in that regime.
+    SUBBLOCK = 8192
+
+    def _filter(self, chunk):
+        filtered, self.zi = sosfilt(self.sos, chunk, zi=self.zi)
+        self.zi[np.abs(self.zi) < 1e-30] = 0.0
+        return filtered
+
+    def process(self, chunk):
+        n = self.SUBBLOCK
+        if len(chunk) <= n:
+            return self._filter(chunk)
+        return np.concatenate([self._filter(chunk[i:i + n])
+                               for i in range(0, len(chunk), n)])
+
+# Result of a detector backend for one chunk: row/column of the matched
+# tones, their amplitudes, a 0..1 confidence and the per-tone energies
+# (FREQS_LOW followed by FREQS_HIGH)
+ToneDetection = namedtuple(
+    'ToneDetection',
+    'low_idx high_idx low_amp high_amp confidence energies')
+
+# numpy >= 2.0 can write FFT results into a preallocated array
+_RFFT_HAS_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+
+class _SpectrumLayout:
+    # Everything FFTPeakDetector needs for one chunk length, computed once:
+    # the window, rfft work buffers, the peak distance in bins, the
+    # find_peaks search band and which bins of that band fall within tol
+    # of each DTMF tone
+    def __init__(self, n, sample_rate, tones, tol, distance_hz):
+        self.window = np.hanning(n)
+        self.windowed = np.empty(n)
+        n_bins = n // 2 + 1
+        self.spectrum = np.empty(n_bins, dtype=complex)
+        self.magnitude = np.empty(n_bins)
+        # Strictly positive frequencies, as np.fft.fftfreq(n) > 0
+        self.pos_stop = (n - 1) // 2 + 1
+        self.distance = max(1, int(round(distance_hz * n / sample_rate)))
+        # Converts |X(f)| back to a sinusoid amplitude
+        self.amp_scale = 2.0 / np.sum(self.window)
+
+        bin_freqs = np.arange(n_bins) * (sample_rate / n)
+        near = np.abs(bin_freqs[None, :] - tones[:, None]) < tol
+        near[:, 0] = False
+        near[:, self.pos_stop:] = False
+        tone_bins = np.flatnonzero(near.any(axis=0))
+        if len(tone_bins):
+            # Keep a peak-distance margin so the band edges behave like the full spectrum
+            self.band_start = max(1, tone_bins[0] - self.distance)
+            self.band_stop = min(self.pos_stop, tone_bins[-1] + self.distance + 1)
+        else:
+            self.band_start = self.band_stop = 1
+        self.members = near[:, self.band_start:self.band_stop]
+
+class FFTPeakDetector:
+    # Real FFT + find_peaks detector. The window, output buffers and the
+    # tone -> bin map are precomputed per chunk length, so a chunk costs one
+    # rfft and a peak search over the DTMF band only.
+    def __init__(self, sample_rate, freqs_low=FREQS_LOW, freqs_high=FREQS_HIGH,
+                 tol=40, distance_hz=100, min_power_ratio=0.5, freq_scale=1):
+        # freq_scale multiplies the tone plan, tolerance and peak distance
+        # (accelerated audio). distance_hz is converted to bins per chunk
+        # length and stays below the closest low/high pair (1218/1336 Hz).
+        # min_power_ratio rejects chunks the two tones do not fill, e.g. a
+        # short frame straddling a tone edge, as in GoertzelDetector.
+        self.sample_rate = sample_rate
+        self.freqs_low = [f * freq_scale for f in freqs_low]
+        self.freqs_high = [f * freq_scale for f in freqs_high]
+        self.tones = np.array(self.freqs_low + self.freqs_high, dtype=float)
+        self.tol = tol * freq_scale
+        self.distance_hz = distance_hz * freq_scale
+        self.min_power_ratio = min_power_ratio
+        self._layouts = {}
+
+    def _layout(self, n):
+        layout = self._layouts.get(n)
+        if layout is None:
+            layout = _SpectrumLayout(n, self.sample_rate, self.tones,
+                                     self.tol, self.distance_hz)
+            self._layouts[n] = layout
+        return layout
+
+    def detect(self, chunk, stats=None):
+        # stats (a PipelineStats) times the window/fft/peaks/match stages
+        if stats is not None:
+            t = time.perf_counter()
+        layout = self._layout(len(chunk))
+        np.multiply(chunk, layout.window, out=layout.windowed)
+        if stats is not None:
+            t = stats.lap('window', t)
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(layout.windowed, out=layout.spectrum)
+        else:
+            layout.spectrum[:] = np.fft.rfft(layout.windowed)
+        magnitude = np.abs(layout.spectrum, out=layout.magnitude)
+        if stats is not None:
+            t = stats.lap('fft', t)
+
+        # Detect frequency peaks, threshold relative to the whole spectrum
+        height = np.max(magnitude[1:layout.pos_stop]) * 0.2
+        peaks, props = find_peaks(magnitude[layout.band_start:layout.band_stop],
+                                  height=height,
+                                  distance=layout.distance,
+                                  prominence=0.1)
+        if stats is not None:
+            t = stats.lap('peaks', t)
+
+        detection = self._match(chunk, layout, peaks, props['peak_heights'])
+        if stats is not None:
+            stats.lap('match', t)
+        return detection
+
+    def _match(self, chunk, layout, peaks, peak_heights):
+        # Match detected peaks to DTMF tones through the precomputed bin map
+        hits = layout.members[:, peaks]
+        energies = np.max(np.where(hits, peak_heights, 0.0), axis=1,
+                          initial=0.0)
+
+        # Validate detected frequencies
+        n_low = len(self.freqs_low)
+        low_tones, low_peaks = np.nonzero(hits[:n_low])
+        high_tones, high_peaks = np.nonzero(hits[n_low:])
+        if len(low_tones) != 1 or len(high_tones) != 1:
+            return None
+        low_idx, low_amp = int(low_tones[0]), peak_heights[low_peaks[0]]
+        high_idx, high_amp = int(high_tones[0]), peak_heights[high_peaks[0]]
+
+        ratio_amp = min(low_amp, high_amp) / max(low_amp, high_amp)
+        if ratio_amp <= 0.2:
+            return None
+
+        # Share of the chunk power explained by the two tones
+        tone_power = 0.5 * (low_amp**2 + high_amp**2) * layout.amp_scale**2
+        if tone_power < self.min_power_ratio * np.dot(chunk, chunk) / len(chunk):
+            return None
+        return ToneDetection(low_idx, high_idx, low_amp, high_amp,
+                             ratio_amp, energies)
+
+class GoertzelDetector:
+    # Goertzel filter bank evaluated only at the DTMF tone frequencies.
+    # Each Goertzel filter yields a single DFT term, so for a fixed chunk
+    # length the whole bank reduces to one projection onto precomputed
+    # windowed cos/sin rows.
+    def __init__(self, sample_rate, freqs_low=FREQS_LOW, freqs_high=FREQS_HIGH,
+                 min_power_ratio=0.5, min_twist=0.2, freq_scale=1):
+        # freq_scale multiplies the tone plan (accelerated audio)
+        self.sample_rate = sample_rate
+        self.freqs_low = [f * freq_scale for f in freqs_low]
+        self.freqs_high = [f * freq_scale for f in freqs_high]
+        self.freqs = np.array(self.freqs_low + self.freqs_high, dtype=float)
+        self.min_power_ratio = min_power_ratio
+        self.min_twist = min_twist
+        self._basis_len = None
+        self._basis = None
+        self._amp_scale = None
+
+    def _prepare(self, n):
+        if self._basis_len == n:
+            return
+        window = np.hanning(n)
+        phase = 2 * np.pi * np.outer(self.freqs, np.arange(n)) / self.sample_rate
+        self._basis = np.vstack((np.cos(phase), np.sin(phase))) * window
+        # Converts |X(f)| back to a sinusoid amplitude
+        self._amp_scale = 2.0 / (np.sum(window) + 1e-12)
+        self._basis_len = n
+
+    def tone_energies(self, chunk):
+        # Squared DFT magnitude at each tone (FREQS_LOW then FREQS_HIGH)
+        self._prepare(len(chunk))
+        proj = self._basis @ chunk
+        n_tones = len(self.freqs)
+        return proj[:n_tones]**2 + proj[n_tones:]**2
+
+    def detect(self, chunk, stats=None):
+        # stats (a PipelineStats) times the stages; the window is folded
+        # into the projection, which is accounted as 'fft'
+        if stats is not None:
+            t = time.perf_counter()
+        energies = self.tone_energies(chunk)
+        if stats is not None:
+            t = stats.lap('fft', t)
+        amps = np.sqrt(energies) * self._amp_scale
+
+        n_low = len(self.freqs_low)
+        low_idx = int(np.argmax(amps[:n_low]))
+        high_idx = int(np.argmax(amps[n_low:]))
+        if stats is not None:
+            t = stats.lap('peaks', t)
+        detection = self._match(chunk, energies, amps, low_idx, high_idx)
+        if stats is not None:
+            stats.lap('match', t)
+        return detection
+
+    def _match(self, chunk, energies, amps, low_idx, high_idx):
+        # Power and twist checks on the strongest low/high tones
+        n_low = len(self.freqs_low)
+        low_amp = amps[low_idx]
+        high_amp = amps[n_low + high_idx]
+
+        # Share of the chunk power explained by the two strongest tones
+        power = np.dot(chunk, chunk) / len(chunk) + 1e-12
+        power_ratio = 0.5 * (low_amp**2 + high_amp**2) / power
+        if power_ratio < self.min_power_ratio:
+            return None
+
+        ratio_amp = min(low_amp, high_amp) / (max(low_amp, high_amp) + 1e-12)
+        if ratio_amp < self.min_twist:
+            return None
+        return ToneDetection(low_idx, high_idx, low_amp, high_amp,
+                             min(power_ratio, 1.0), energies)
+
+DETECTORS = {
+    'fft': FFTPeakDetector,
+    'goertzel': GoertzelDetector,
+}
+
+def make_detector(detector, sample_rate, **kwargs):
+    # Accepts a backend name from DETECTORS or an already built detector
+    if isinstance(detector, str):
+        try:
+            detector_cls = DETECTORS[detector]
+        except KeyError:
+            raise ValueError(f"Unknown detector '{detector}', "
+                             f"choose from {sorted(DETECTORS)}") from None
+        return detector_cls(sample_rate, **kwargs)
+    return detector
+
+class RingBuffer:
+    # Fixed-capacity float32 sample ring for one producer (the audio
+    # callback) and one consumer (the processing thread). Indices only ever
+    # grow and each is written by a single side, so the data path needs no
+    # lock. Every sample is stored twice, at i and i + capacity, so any
+    # window of up to `capacity` samples is a contiguous view.
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, capacity, overflow='drop_oldest', dtype=np.float32,
+                 block_timeout=1.0):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', "
+                             f"choose from {self.OVERFLOW_POLICIES}")
+        self.capacity = int(capacity)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._buf = np.zeros(2 * self.capacity, dtype=dtype)
+        self._write_index = 0
+        self._read_index = 0
+        self._pending = 0
+        self._data_ready = threading.Event()
+        self._space_ready = threading.Event()
+
+        self.overruns = 0
+        self.dropped_samples = 0
+
+    @property
+    def read_index(self):
+        # Stream position of the next sample read() will return
+        return self._read_index + self._pending
+
+    @property
+    def write_index(self):
+        # Stream position of the next sample write() will store
+        return self._write_index
+
+    def fill(self):
+        # Space taken from the producer's point of view, including the view
+        # still held by the consumer
+        return min(self._write_index - self._read_index, self.capacity)
+
+    def available(self):
+        # Samples the next read() can return, excluding the view held by
+        # the consumer
+        return min(self._write_index - self.read_index, self.capacity)
+
+    def _store(self, samples):
+        n = len(samples)
+        start = self._write_index % self.capacity
+        first = min(n, self.capacity - start)
+        for offset in (0, self.capacity):
+            self._buf[offset + start:offset + start + first] = samples[:first]
+            self._buf[offset:offset + n - first] = samples[first:]
+        self._write_index += n
+        self._data_ready.set()
+
+    def _wait_for_space(self, n):
+        deadline = None
+        if self.block_timeout is not None:
+            deadline = time.monotonic() + self.block_timeout
+        while self.capacity - (self._write_index - self._read_index) < n:
+            self._space_ready.clear()
+            if self.capacity - (self._write_index - self._read_index) >= n:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._space_ready.wait(remaining)
+        return True
+
+    def write(self, samples):
+        # Called from the producer thread only; returns the number of samples kept
+        samples = np.asarray(samples).reshape(-1)
+
+        if self.overflow == 'block':
+            written = 0
+            while written < len(samples):
+                part = samples[written:written + self.capacity]
+                if not self._wait_for_space(len(part)):
+                    self.overruns += 1
+                    self.dropped_samples += len(samples) - written
+                    break
+                self._store(part)
+                written += len(part)
+            return written
+
+        if self.overflow == 'drop_newest':
+            free = self.capacity - (self._write_index - self._read_index)
+            if len(samples) > free:
+                self.overruns += 1
+                self.dropped_samples += len(samples) - free
+                samples = samples[:free]
+            self._store(samples)
+            return len(samples)
+
+        # drop_oldest: the consumer notices the overwrite and skips ahead
+        if len(samples) > self.capacity:
+            self._write_index += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        self._store(samples)
+        return len(samples)
+
+    def read(self, n, timeout=None):
+        # Called from the consumer thread only. Returns a zero-copy view of
+        # the next n samples, valid until the following read() call, or
+        # None if they did not arrive within timeout seconds. Under
+        # drop_oldest a producer that laps the reader overwrites even the
+        # view being processed (the lock-free writer cannot wait for it):
+        # use 'block' or 'drop_newest', or copy the view, when that matters.
+        if n > self.capacity:
+            raise ValueError(f"Cannot read {n} samples from a ring of "
+                             f"{self.capacity}")
+
+        # Release the previous view back to the producer
+        self._read_index += self._pending
+        self._pending = 0
+        self._space_ready.set()
+
+        while self._write_index - self._read_index < n:
+            self._data_ready.clear()
+            if self._write_index - self._read_index >= n:
+                break
+            if not self._data_ready.wait(timeout):
+                return None
+
+        lag = self._write_index - self._read_index
+        if lag > self.capacity:
+            # Producer lapped us under drop_oldest
+            self.overruns += 1
+            self.dropped_samples += lag - self.capacity
+            self._read_index += lag - self.capacity
+
+        start = self._read_index % self.capacity
+        self._pending = n
+        return self._buf[start:start + n]
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "fill": self.available(),
+            "written": self._write_index,
+            "read": self._read_index + self._pending,
+            "overruns": self.overruns,
+            "dropped_samples": self.dropped_samples,
+        }
+
+class ToneSegmenter:
+    # Tone on/off state machine on the sample clock. A symbol is emitted
+    # once its tone has lasted min_tone_samples, and the next one only after
+    # at least min_gap_samples without any tone, so timing does not depend
+    # on how fast (or late) the audio is processed.
+    def __init__(self, min_tone_samples, min_gap_samples):
+        self.min_tone_samples = min_tone_samples
+        self.min_gap_samples = min_gap_samples
+        self.reset()
+
+    def reset(self):
+        self.current = None
+        self.onset = 0
+        self.emitted = False
+        self.gap_start = 0
+        self.armed = True
+
+    def update(self, symbol, start, n):
+        # Feeds the detection for samples [start, start + n). Returns the
+        # onset sample when this completes a new symbol, else None.
+        end = start + n
+        if symbol is None:
+            if self.current is not None:
+                self.current = None
+                self.gap_start = start
+            if not self.armed and end - self.gap_start >= self.min_gap_samples:
+                self.armed = True
+            return None
+
+        if symbol != self.current:
+            if self.current is not None and self.min_gap_samples <= 0:
+                self.armed = True
+            self.current = symbol
+            self.onset = start
+            self.emitted = False
+        if (self.armed and not self.emitted
+                and end - self.onset >= self.min_tone_samples):
+            self.emitted = True
+            self.armed = False
+            return self.onset
+        return None
+
+# A decoded symbol located by the onset sample of its tone in the input,
+# with the tone energies of the frame that confirmed it. Decoders deliver
+# these to their subscribers as symbol events.
+DecodedSymbol = namedtuple('DecodedSymbol', 'char sample time confidence energies')
+SymbolEvent = DecodedSymbol
+DecodeResult = namedtuple('DecodeResult', 'text symbols')
+
+class PipelineStats:
+    # Instrumentation for a decoder: time per stage, real-time factor, ring
+    # queue depth and capture-to-emission latency. Decoders only call into
+    # it when one is attached, so a disabled pipeline pays an `is None`
+    # test per stage. Counters are updated by the processing thread, with
+    # capture marks appended from the audio thread.
+    STAGES = ('filter', 'window', 'fft', 'peaks', 'match')
+
+    def __init__(self, dump_interval=None, dump=print):
+        # dump_interval (seconds) enables periodic dump(report) calls
+        self.dump_interval = dump_interval
+        self.dump = dump
+        self.reset()
+
+    def reset(self):
+        self.totals = dict.fromkeys(self.STAGES, 0.0)
+        self.calls = dict.fromkeys(self.STAGES, 0)
+        self.max = dict.fromkeys(self.STAGES, 0.0)
+        self.samples = 0
+        self.queue_last = 0
+        self.queue_max = 0
+        self._queue_sum = 0
+        self._queue_n = 0
+        self.latencies = 0
+        self._latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+        self._captures = deque(maxlen=4096)
+        self._next_dump = time.perf_counter() + (self.dump_interval or 0)
+
+    def lap(self, stage, start):
+        # Charges the time since start to stage, returns now for the next lap
+        now = time.perf_counter()
+        elapsed = now - start
+        self.totals[stage] += elapsed
+        self.calls[stage] += 1
+        if elapsed > self.max[stage]:
+            self.max[stage] = elapsed
+        return now
+
+    def queue(self, depth):
+        # Samples waiting in the ring after a read
+        self.queue_last = depth
+        self._queue_sum += depth
+        self._queue_n += 1
+        if depth > self.queue_max:
+            self.queue_max = depth
+
+    def captured(self, end, timestamp):
+        # Producer side: stream samples before index end were captured by timestamp
+        self._captures.append((end, timestamp))
+
+    def emitted(self, end, sample_rate):
+        # Consumer side: a symbol was emitted once samples before end were
+        # processed. Latency runs from the capture of sample end - 1.
+        captures = self._captures
+        while captures and captures[0][0] < end:
+            captures.popleft()
+        if not captures:
+            return
+        mark_end, timestamp = captures[0]
+        latency = time.perf_counter() - (timestamp - (mark_end - end) / sample_rate)
+        self.latencies += 1
+        self._latency_sum += latency
+        self.latency_last = latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def snapshot(self, sample_rate, ring=None):
+        busy = sum(self.totals.values())
+        audio = self.samples / sample_rate
+        stats = {
+            "stages": {stage: {
+                "total_s": self.totals[stage],
+                "mean_us": 1e6 * self.totals[stage] / self.calls[stage]
+                           if self.calls[stage] else 0.0,
+                "max_us": 1e6 * self.max[stage],
+                "calls": self.calls[stage],
+            } for stage in self.STAGES},
+            "audio_seconds": audio,
+            "busy_seconds": busy,
+            "rtf": busy / audio if audio else 0.0,
+            "queue_depth": {
+                "last": self.queue_last,
+                "max": self.queue_max,
+                "mean": self._queue_sum / self._queue_n if self._queue_n else 0.0,
+            },
+            "latency": {
+                "symbols": self.latencies,
+                "last_ms": 1e3 * self.latency_last,
+                "mean_ms": 1e3 * self._latency_sum / self.latencies
+                           if self.latencies else 0.0,
+                "max_ms": 1e3 * self.latency_max,
+            },
+        }
+        if ring is not None:
+            stats["overruns"] = ring.overruns
+            stats["dropped_samples"] = ring.dropped_samples
+        return stats
+
+    def report(self, sample_rate, ring=None):
+        # One-line summary of snapshot()
+        s = self.snapshot(sample_rate, ring)
+        stages = " ".join(f"{stage} {info['mean_us']:.0f}us"
+                          for stage, info in s["stages"].items() if info["calls"])
+        line = (f"[STATS] RTF {s['rtf']:.3f} | {stages} | queue "
+                f"{s['queue_depth']['last']}/{s['queue_depth']['max']} | latency "
+                f"{s['latency']['mean_ms']:.1f}/{s['latency']['max_ms']:.1f} ms")
+        if ring is not None:
+            line += f" | overruns {s['overruns']} ({s['dropped_samples']} samples)"
+        return line
+
+    def maybe_dump(self, sample_rate, ring=None):
+        # Calls dump(report) once per dump_interval, if one was set
+        if self.dump_interval is None:
+            return
+        now = time.perf_counter()
+        if now >= self._next_dump:
+            self._next_dump = now + self.dump_interval
+            self.dump(self.report(sample_rate, ring))
+
+class DTMFDecoder:
+    # Detection stages shared by the live and file decoders. Input of any
+    # block size is bandpassed once, cut into analysis frames of chunk_size
+    # samples every hop_size samples, and each frame's detection drives a
+    # ToneSegmenter. Minimum tone/gap lengths default to half a frame and
+    # one frame plus half a hop.
+    #
+    # speed_factor decodes audio accelerated by that factor as is, without
+    # restoring it first: tones, tolerances and the bandpass are scaled up
+    # and all durations/sample counts (given for normal speed) scaled down.
+    #
+    # instrument=True (or a PipelineStats) records stage timings in
+    # self.pipeline_stats; it is None, and costs nothing, by default.
+    def __init__(self, sample_rate=44100, detector='fft', chunk_duration=0.1,
+                 hop_duration=None, min_tone_samples=None, min_gap_samples=None,
+                 speed_factor=1, instrument=None):
+        self.sample_rate = sample_rate
+        self.speed_factor = speed_factor
+        self.chunk_duration = chunk_duration / speed_factor
+        self.chunk_size = int(self.sample_rate * self.chunk_duration)
+        if hop_duration is None:
+            self.hop_size = self.chunk_size
+        else:
+            self.hop_size = min(self.chunk_size, max(
+                1, int(self.sample_rate * hop_duration / speed_factor)))
+        if min_tone_samples is None:
+            min_tone_samples = self.chunk_size // 2
+        else:
+            min_tone_samples = int(min_tone_samples / speed_factor)
+        if min_gap_samples is None:
+            min_gap_samples = self.chunk_size + self.hop_size // 2
+        else:
+            min_gap_samples = int(min_gap_samples / speed_factor)
+
+        nyq = 0.5 * self.sample_rate
+        lowcut = 600 * speed_factor
+        highcut = min(2000 * speed_factor, 0.99 * nyq)
+        if lowcut >= highcut:
+            raise ValueError(f"Speed factor {speed_factor} moves the DTMF band "
+                             f"above Nyquist at {self.sample_rate} Hz")
+        self.detector = make_detector(detector, self.sample_rate,
+                                      freq_scale=speed_factor)
+        self.bandpass = StreamingBandpass(lowcut, highcut, self.sample_rate)
+        self.segmenter = ToneSegmenter(min_tone_samples, min_gap_samples)
+        self._frame = np.zeros(self.chunk_size)
+        if instrument is True:
+            instrument = PipelineStats()
+        self.pipeline_stats = instrument or None
+        self._listeners = []
+        self.dropped_events = 0
+        self.reset()
+
+    def reset(self):
+        # Forget filter, framing and segmentation state before a new stream
+        self.bandpass.reset()
+        self.segmenter.reset()
+        self._frame[:] = 0
+        self._fill = 0
+        self.position = 0
+
+    def subscribe(self, callback):
+        # callback(event) receives every DecodedSymbol as soon as feed() or
+        # flush() completes it, on the decoding thread; keep it short
+        self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    def event_queue(self, maxsize=0):
+        # Subscribes a queue.Queue to the events and returns it. Events that
+        # do not fit a bounded queue are dropped and counted, the decoder
+        # never waits for a slow consumer.
+        events = queue.Queue(maxsize)
+
+        def put(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                self.dropped_events += 1
+
+        self.subscribe(put)
+        return events
+
+    def _publish(self, symbols):
+        for symbol in symbols:
+            for callback in self._listeners:
+                callback(symbol)
+
+    def detect_frame(self, frame):
+        # Detection on one filtered frame, returns a ToneDetection or None
+        if np.max(np.abs(frame)) < 0.01:
+            return None
+        if self.pipeline_stats is None:
+            return self.detector.detect(frame)
+        return self.detector.detect(frame, self.pipeline_stats)
+
+    def symbol_for(self, detection):
+        return SYMBOLS.symbol(detection.low_idx, detection.high_idx)
+
+    def _analyze(self, n_new):
+        # Runs detection on the current frame, which ends with n_new fresh samples
+        detection = self.detect_frame(self._frame)
+        symbol = None if detection is None else self.symbol_for(detection)
+        onset = self.segmenter.update(symbol, self.position - n_new, n_new)
+        if onset is None:
+            return None
+        return DecodedSymbol(symbol, onset, onset / self.sample_rate,
+                             float(detection.confidence), detection.energies)
+
+    def feed(self, samples):
+        # Consumes a block of samples, returns the DecodedSymbols it completed.
+        # Every sample goes through the filter, silent or not, to keep its
+        # state continuous.
+        stats = self.pipeline_stats
+        if stats is not None:
+            t = time.perf_counter()
+        filtered = self.bandpass.process(samples)
+        if stats is not None:
+            stats.lap('filter', t)
+            stats.samples += len(samples)
+        hop = self.hop_size
+        tail = self.chunk_size - hop
+        decoded = []
+        pos = 0
+        while pos < len(filtered):
+            if self._fill == 0 and tail:
+                self._frame[:tail] = self._frame[hop:]
+            n = min(hop - self._fill, len(filtered) - pos)
+            self._frame[tail + self._fill:tail + self._fill + n] = filtered[pos:pos + n]
+            self._fill += n
+            self.position += n
+            pos += n
+            if self._fill == hop:
+                self._fill = 0
+                symbol = self._analyze(hop)
+                if symbol is not None:
+                    decoded.append(symbol)
+        if decoded and self._listeners:
+            self._publish(decoded)
+        return decoded
+
+    def flush(self):
+        # Analyzes a trailing partial hop (zero padded) at the end of a stream
+        if not self._fill:
+            return []
+        n_new = self._fill
+        self._frame[self.chunk_size - self.hop_size + n_new:] = 0
+        self._fill = 0
+        symbol = self._analyze(n_new)
+        if symbol is None:
+            return []
+        self._publish([symbol])
+        return [symbol]
+
+class SymbolPrinter:
+    # Optional console consumer of a decoder's events. It runs on its own
+    # thread, fed by a queue, and prints the new symbols at most once per
+    # min_interval seconds, so terminal I/O never stalls decoding.
+    def __init__(self, decoder, min_interval=0.25, tail=40, stream=None):
+        self.decoder = decoder
+        self.min_interval = min_interval
+        self.tail = tail
+        self.stream = stream
+        self.count = 0
+        self._text_tail = ""
+        self._events = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self.decoder.subscribe(self._events.put)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Prints what is still pending and detaches from the decoder
+        self.decoder.unsubscribe(self._events.put)
+        self._events.put(None)
+        self._thread.join()
+
+    def _print(self, chars):
+        new = "".join(chars)
+        self.count += len(new)
+        self._text_tail = (self._text_tail + new)[-self.tail:]
+        print(f"[LIVE] +{new}  ({self.count} symbols) ...{self._text_tail}",
+              file=self.stream or sys.stdout, flush=True)
+
+    def _run(self):
+        pending = []
+        next_print = 0.0
+        while True:
+            timeout = max(0.0, next_print - time.monotonic()) if pending else None
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                event = ()
+            if event is None:
+                break
+            if event:
+                pending.append(event.char)
+            if pending and time.monotonic() >= next_print:
+                self._print(pending)
+                pending = []
+                next_print = time.monotonic() + self.min_interval
+        if pending:
+            self._print(pending)
+
+class AudioSource:
+    # An input for LiveDecoder. A source pushes mono float32 blocks to
+    # callback(block, captured) from its own thread, `captured` being the
+    # perf_counter time of the block's last sample, sets `done` and calls
+    # on_end() once it runs out or is stopped. Subclasses either provide
+    # blocks(), which the default thread paces at real time when `realtime`
+    # is set (unthrottled otherwise), or override start()/stop() for a
+    # device that has its own callback thread.
+    def __init__(self, sample_rate, blocksize=1024, realtime=False):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.realtime = realtime
+        self.done = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def blocks(self):
+        raise NotImplementedError
+
+    def start(self, callback, on_end=None):
+        self.done.clear()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback, on_end),
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, callback, on_end):
+        start = time.perf_counter()
+        sent = 0
+        try:
+            for block in self.blocks():
+                if self._stopping.is_set():
+                    break
+                sent += len(block)
+                if self.realtime:
+                    # Deliver each block once its last sample has "arrived"
+                    delay = start + sent / self.sample_rate - time.perf_counter()
+                    if delay > 0 and self._stopping.wait(delay):
+                        break
+                callback(block, time.perf_counter())
+        finally:
+            self.done.set()
+            if on_end is not None:
+                on_end()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class MicrophoneSource(AudioSource):
+    # Default input device through sounddevice, imported on start() so
+    # headless machines can use every other source
+    def __init__(self, sample_rate=44100, blocksize=1024):
+        super().__init__(sample_rate, blocksize, realtime=True)
+        self._stream = None
+
+    def start(self, callback, on_end=None):
+        import sounddevice as sd
+
+        def audio_callback(indata, frames, time_info, status):
+            if status:
+                print(status)
+            # PortAudio stamps the block's first sample at the ADC; the last
+            # one was captured (frames - 1) samples later
+            captured = time.perf_counter()
+            adc = getattr(time_info, 'inputBufferAdcTime', 0)
+            current = getattr(time_info, 'currentTime', 0)
+            if adc and current:
+                captured -= max(0.0, current - adc - (frames - 1) / self.sample_rate)
+            callback(indata[:, 0], captured)
+
+        self.done.clear()
+        self._on_end = on_end
+        stream = sd.InputStream(callback=audio_callback, channels=1,
+                                samplerate=self.sample_rate,
+                                blocksize=self.blocksize)
+        try:
+            stream.start()
+        except BaseException:
+            stream.close()
+            raise
+        self._stream = stream
+
+    def stop(self):
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+        self.done.set()
+        if self._on_end is not None:
+            self._on_end()
+
+class WavFileSource(AudioSource):
+    # Plays a sound file (channel 0) at real time, or as fast as the
+    # decoder takes it when realtime=False
+    def __init__(self, path, blocksize=1024, realtime=True):
+        super().__init__(sf.info(path).samplerate, blocksize, realtime)
+        self.path = path
+
+    def blocks(self):
+        with sf.SoundFile(self.path) as f:
+            for block in f.blocks(blocksize=self.blocksize, dtype='float32',
+                                  always_2d=True):
+                yield block[:, 0]
+
+class StdinSource(AudioSource):
+    # Raw interleaved PCM from a binary stream (stdin by default), channel
+    # 0 decoded. The writer sets the pace, so there is no throttling.
+    PCM_DTYPES = ('int16', 'int32', 'float32')
+
+    def __init__(self, sample_rate=44100, dtype='int16', channels=1,
+                 blocksize=1024, stream=None):
+        if dtype not in self.PCM_DTYPES:
+            raise ValueError(f"Unknown PCM dtype '{dtype}', "
+                             f"choose from {self.PCM_DTYPES}")
+        super().__init__(sample_rate, blocksize)
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        self.stream = stream
+
+    def blocks(self):
+        stream = self.stream or sys.stdin.buffer
+        frame_bytes = self.dtype.itemsize * self.channels
+        scale = 1.0 if self.dtype.kind == 'f' else 2.0 ** (8 * self.dtype.itemsize - 1)
+        while True:
+            data = stream.read(self.blocksize * frame_bytes)
+            n_frames = len(data) // frame_bytes
+            if not n_frames:
+                return
+            pcm = np.frombuffer(data, self.dtype, count=n_frames * self.channels)
+            yield (pcm[::self.channels] / scale).astype(np.float32)
+
+class SyntheticSource(AudioSource):
+    # In-memory DTMF for load tests: `text` encoded once (or a ready
+    # `signal`), played `repeat` times with optional white noise at snr_db
+    def __init__(self, text=None, signal=None, sample_rate=44100, blocksize=1024,
+                 realtime=False, repeat=1, snr_db=None, seed=0, **encode_options):
+        super().__init__(sample_rate, blocksize, realtime)
+        if signal is None:
+            signal = synthesize_phrase(text, sample_rate=sample_rate, **encode_options)
+            signal /= (np.max(np.abs(signal)) + 1e-9)
+        self.signal = np.asarray(signal, dtype=np.float32)
+        self.repeat = repeat
+        self.snr_db = snr_db
+        self.seed = seed
+
+    def blocks(self):
+        rng = np.random.default_rng(self.seed)
+        noise_rms = None
+        if self.snr_db is not None:
+            noise_rms = np.sqrt(np.mean(self.signal**2)) / 10**(self.snr_db / 20)
+        for _ in range(self.repeat):
+            for i in range(0, len(self.signal), self.blocksize):
+                block = self.signal[i:i + self.blocksize]
+                if noise_rms is not None:
+                    block = block + rng.normal(0, noise_rms, len(block)).astype(np.float32)
+                yield block
+
+AUDIO_SOURCES = {
+    'mic': MicrophoneSource,
+    'wav': WavFileSource,
+    'stdin': StdinSource,
+    'synthetic': SyntheticSource,
+}
+
+async def _in_executor(executor, fn, *args):
+    # run_in_executor that, when cancelled, still waits for fn to return
+    # before propagating the cancellation, so no worker touches decoder
+    # state after the caller has moved on
+    future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+class LiveDecoder(DTMFDecoder):
+    # Real-time DTMF decoder fed by an AudioSource, the microphone unless
+    # `source` is given. Unthrottled sources should use overflow='block'
+    # so the ring makes them wait instead of dropping audio.
+    # stats_interval (seconds) turns on instrumentation with a periodic
+    # [STATS] line.
+    def __init__(self, detector='fft', buffer_duration=5.0, overflow='drop_oldest',
+                 stats_interval=None, source=None, **options):
+        if stats_interval is not None:
+            options['instrument'] = PipelineStats(dump_interval=stats_interval)
+        sample_rate = source.sample_rate if source is not None else 44100
+        super().__init__(sample_rate=sample_rate, detector=detector, **options)
+        self.source = source
+        self.ring = RingBuffer(int(self.sample_rate * buffer_duration),
+                               overflow=overflow)
+        self.running = False
+        self.decoded_chars = []
+        self._wake = None
+
+    @property
+    def text(self):
+        # Joined on demand; decoding only appends to decoded_chars
+        return "".join(self.decoded_chars)
+
+    def _source(self):
+        return self.source or MicrophoneSource(self.sample_rate, self.hop_size)
+
+    def on_audio(self, block, captured=None):
+        # AudioSource callback (source thread): queue the block for decoding
+        self.ring.write(block)
+        stats = self.pipeline_stats
+        if stats is not None:
+            stats.captured(self.ring.write_index,
+                           time.perf_counter() if captured is None else captured)
+
+    def _consume(self, block):
+        # Decodes one block read from the ring, returns its symbols
+        symbols = self.feed(block)
+        stats = self.pipeline_stats
+        if stats is not None:
+            stats.queue(self.ring.available())
+            if symbols:
+                stats.emitted(self.ring.read_index, self.sample_rate)
+            stats.maybe_dump(self.sample_rate, self.ring)
+        self.decoded_chars.extend(symbol.char for symbol in symbols)
+        return symbols
+
+    def process_audio(self):
+        while self.running:
+            block = self.ring.read(self.hop_size, timeout=0.1)
+            if block is not None:
+                self._consume(block)
+
+    def _drain(self, max_hops=None):
+        # Decodes the full hops waiting in the ring without blocking. With
+        # max_hops it returns after that many, or as soon as stop() is called.
+        symbols = []
+        hops = 0
+        while self.ring.available() >= self.hop_size:
+            if max_hops is not None and (hops >= max_hops or not self.running):
+                break
+            block = self.ring.read(self.hop_size, timeout=0)
+            if block is None:
+                break
+            symbols.extend(self._consume(block))
+            hops += 1
+        return symbols
+
+    def _finish(self):
+        # Once the source has ended: what is left in the ring, then the
+        # trailing partial hop
+        symbols = self._drain()
+        rest = self.ring.available()
+        if rest:
+            symbols.extend(self._consume(self.ring.read(rest, timeout=0)))
+        tail = self.flush()
+        self.decoded_chars.extend(symbol.char for symbol in tail)
+        return symbols + tail
+
+    async def events(self, executor=None, drain_hops=8):
+        # Async iterator over the source's SymbolEvents:
+        #
+        #     async with contextlib.aclosing(decoder.events()) as events:
+        #         async for event in events: ...
+        #
+        # The audio callback only fills the ring and wakes the event loop
+        # through call_soon_threadsafe, nothing polls. Detection runs in
+        # `executor` (the loop's default if None), at most drain_hops hops
+        # per call, so events flow while a fast source keeps the ring full
+        # and cancelling never waits for more than one such drain.
+        # Cancelling the consumer, closing the iterator or stop() closes
+        # the source (in the executor) and waits for in-flight detection.
+        # The iteration ends by itself when a finite source runs out.
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        events = asyncio.Queue()
+        finished = object()
+        source = self._source()
+
+        def callback(block, captured):
+            self.on_audio(block, captured)
+            loop.call_soon_threadsafe(wake.set)
+
+        def on_end():
+            loop.call_soon_threadsafe(wake.set)
+
+        async def pump():
+            try:
+                while self.running:
+                    # Cleared before looking at the ring, so a write after
+                    # the check still wakes the wait below
+                    wake.clear()
+                    # Everything the source wrote precedes `done`
+                    ended = source.done.is_set()
+                    if self.ring.available() >= self.hop_size:
+                        symbols = await _in_executor(executor, self._drain,
+                                                     drain_hops)
+                    elif ended:
+                        for symbol in await _in_executor(executor, self._finish):
+                            events.put_nowait(symbol)
+                        break
+                    else:
+                        await wake.wait()
+                        continue
+                    for symbol in symbols:
+                        events.put_nowait(symbol)
+            except Exception as exc:
+                events.put_nowait(exc)
+            events.put_nowait(finished)
+
+        self.running = True
+        self.decoded_chars = []
+        self.reset()
+        self._wake = (loop, wake)
+        task = None
+        try:
+            # Inside the try, so a source that fails to start still resets
+            # running and cancels the pump
+            task = loop.create_task(pump())
+            source.start(callback, on_end)
+            while True:
+                event = await events.get()
+                if event is finished:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            self.running = False
+            self._wake = None
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            # Joins the source thread, which can take up to the ring's
+            # block_timeout: keep it off the event loop
+            await _in_executor(executor, source.stop)
+
+    def stop(self):
+        # Ends start_listening() or an events() iteration; any thread
+        self.running = False
+        wake = self._wake
+        if wake is not None:
+            loop, event = wake
+            loop.call_soon_threadsafe(event.set)
+
+    def start_listening(self, print_symbols=True):
+        # Decodes until Ctrl+C, stop() or the end of a finite source and
+        # returns the text. print_symbols attaches a SymbolPrinter;
+        # subscribe() for other uses.
+        source = self._source()
+        self.running = True
+        self.decoded_chars = []
+        self.reset()
+        printer = SymbolPrinter(self).start() if print_symbols else None
+
+        processing_thread = threading.Thread(target=self.process_audio)
+        processing_thread.start()
+        try:
+            # A source that fails to start (no sounddevice, no input device)
+            # must still release the processing thread
+            source.start(self.on_audio)
+            print("Live DTMF decoding started. Press Ctrl+C to stop.")
+            try:
+                while self.running and not source.done.wait(0.1):
+                    pass
+            except KeyboardInterrupt:
+                print("\nStopping live decoding...")
+        except BaseException:
+            if printer is not None:
+                printer.stop()
+            raise
+        finally:
+            source.stop()
+            self.running = False
+            processing_thread.join()
+
+        self._finish()
+        if printer is not None:
+            printer.stop()
+        print("Final decoded text (live):", self.text)
+        print("Filter design cache:", FILTER_CACHE.stats())
+        print("Audio ring buffer:", self.ring.stats())
+        if self.pipeline_stats is not None:
+            print(self.pipeline_stats.report(self.sample_rate, self.ring))
+        return self.text
+
+class FileDecoder(DTMFDecoder):
+    # Offline DTMF decoder reading audio files block by block. Time is
+    # derived from the sample position, so decoding runs as fast as the
+    # detector allows instead of at playback speed.
+    def decode_blocks(self, blocks):
+        # Decodes an iterable of mono/multi-channel blocks, returns a DecodeResult
+        self.reset()
+        symbols = []
+        for block in blocks:
+            if block.ndim > 1:
+                block = block[:, 0]
+            symbols.extend(self.feed(block))
+        symbols.extend(self.flush())
+        return DecodeResult("".join(sym.char for sym in symbols), symbols)
+
+    def _step(self, blocks):
+        # Reads and decodes the next block: (finished, symbols)
+        block = next(blocks, None)
+        if block is None:
+            return True, self.flush()
+        if block.ndim > 1:
+            block = block[:, 0]
+        return False, self.feed(block)
+
+    async def events(self, path, blocksize=65536, executor=None):
+        # Async iterator over the SymbolEvents of a file (path or file
+        # object). Reading and detection run in `executor` block by block;
+        # cancellation waits for the block in progress.
+        with sf.SoundFile(path) as f:
+            if f.samplerate != self.sample_rate:
+                raise ValueError(f"'{path}' is sampled at {f.samplerate} Hz, "
+                                 f"decoder expects {self.sample_rate} Hz")
+            self.reset()
+            blocks = f.blocks(blocksize=blocksize)
+            finished = False
+            while not finished:
+                finished, symbols = await _in_executor(executor, self._step, blocks)
+                for symbol in symbols:
+                    yield symbol
+
+    def decode(self, path, blocksize=65536):
+        with sf.SoundFile(path) as f:
+            if f.samplerate != self.sample_rate:
+                raise ValueError(f"'{path}' is sampled at {f.samplerate} Hz, "
+                                 f"decoder expects {self.sample_rate} Hz")
+            return self.decode_blocks(f.blocks(blocksize=blocksize))
+
+def decode_file(path, detector='fft', **options):
+    # Decodes a DTMF WAV file (path or file object) at its native sample
+    # rate. options are the DTMFDecoder framing/segmentation settings.
+    with sf.SoundFile(path) as f:
+        decoder = FileDecoder(f.samplerate, detector=detector, **options)
+        return decoder.decode_blocks(f.blocks(blocksize=65536))
+
+# Per-file settings a decode manifest may set, with their parsers
+DECODE_PARAMS = {
+    'detector': str,
+    'speed_factor': lambda value: float(Fraction(*speed_ratio(value))),
+    'chunk_duration': float,
+    'hop_duration': float,
+}
+
+def list_decode_inputs(source):
+    # Directory (every .wav below it), manifest or list of paths ->
+    # [(path, options)]. A manifest is CSV/JSONL with a 'file' column,
+    # relative to the manifest, an optional 'id' and optional DECODE_PARAMS
+    # columns.
+    if not isinstance(source, str):
+        return [(path, {}) for path in source]
+    if os.path.isdir(source):
+        inputs = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            inputs.extend((os.path.join(root, name), {}) for name in sorted(files)
+                          if name.lower().endswith('.wav'))
+        return inputs
+
+    base = os.path.dirname(source)
+    inputs = []
+    for n, row in enumerate(_manifest_rows(source)):
+        row = dict(row)
+        params = dict(row.pop('params', None) or {})
+        path = row.pop('file', None)
+        if not path:
+            raise ValueError(f"{source}: record {n} has no file")
+        record_id = row.pop('id', None)
+        params.update((k, v) for k, v in row.items() if v not in (None, ''))
+        unknown = set(params) - set(DECODE_PARAMS)
+        if unknown:
+            raise ValueError(f"{source}: record {n} has unknown "
+                             f"parameters {sorted(unknown)}")
+        options = {k: DECODE_PARAMS[k](v) for k, v in params.items()}
+        if record_id not in (None, ''):
+            options['id'] = str(record_id)
+        inputs.append((os.path.join(base, path), options))
+    return inputs
+
+# FileDecoders of this process by (sample rate, detector, speed factor,
+# chunk duration, hop duration)
+_WORKER_DECODERS = {}
+
+def _worker_decoder(sample_rate, detector, speed_factor, chunk_duration=0.1,
+                    hop_duration=None):
+    # The bandpass design, detector window and spectrum layout are built
+    # once per configuration and reused for every file of a worker
+    key = (sample_rate, detector, speed_factor, chunk_duration, hop_duration)
+    decoder = _WORKER_DECODERS.get(key)
+    if decoder is None:
+        decoder = FileDecoder(sample_rate, detector=detector,
+                              speed_factor=speed_factor,
+                              chunk_duration=chunk_duration,
+                              hop_duration=hop_duration)
+        _WORKER_DECODERS[key] = decoder
+    return decoder
+
+def _decode_chunk(inputs, defaults):
+    # Worker task: decodes a chunk of files into JSON-ready records. A file
+    # that cannot be read or decoded gets an 'error' instead of a text.
+    records = []
+    for path, options in inputs:
+        options = dict(defaults, **options)
+        record = {'file': path if isinstance(path, str) else getattr(path, 'name', '-')}
+        if 'id' in options:
+            record['id'] = options['id']
+        start = time.perf_counter()
+        try:
+            with sf.SoundFile(path) as f:
+                sample_rate = f.samplerate
+                decoder = _worker_decoder(sample_rate, options['detector'],
+                                          options['speed_factor'],
+                                          options['chunk_duration'],
+                                          options['hop_duration'])
+                result = decoder.decode_blocks(f.blocks(blocksize=65536))
+        except (RuntimeError, ValueError) as exc:
+            record['error'] = str(exc)
+            record['decode_time'] = time.perf_counter() - start
+            records.append(record)
+            continue
+        record['text'] = result.text
+        record['symbols'] = [{'char': sym.char, 'sample': int(sym.sample),
+                              'time': sym.time, 'confidence': sym.confidence}
+                             for sym in result.symbols]
+        record['duration'] = decoder.position / sample_rate
+        record['decode_time'] = time.perf_counter() - start
+        records.append(record)
+    return records
+
+def decode_records(inputs, jobs=None, chunksize=8, detector='fft',
+                   speed_factor=1, sample_rate=44100, chunk_duration=0.1,
+                   hop_duration=None):
+    # Yields one decode record per (path, options) input, in input order,
+    # from a process pool of `jobs` workers (jobs=1 decodes inline). Each
+    # worker builds its decoder for `sample_rate` up front; per-file options
+    # override any DECODE_PARAMS. Symbols much shorter than the 100 ms
+    # default frame need a shorter chunk_duration (and hop_duration).
+    defaults = {'detector': detector, 'speed_factor': speed_factor,
+                'chunk_duration': chunk_duration, 'hop_duration': hop_duration}
+    chunks = [inputs[i:i + chunksize] for i in range(0, len(inputs), chunksize)]
+    decode = partial(_decode_chunk, defaults=defaults)
+    config = (sample_rate, detector, speed_factor, chunk_duration, hop_duration)
+    if (jobs or os.cpu_count()) == 1:
+        _worker_decoder(*config)
+        for chunk in chunks:
+            yield from decode(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_worker_decoder,
+                             initargs=config) as pool:
+        for records in pool.map(decode, chunks):
+            yield from records
+
+def batch_decode(source, output_jsonl, jobs=None, chunksize=8, detector='fft',
+                 speed_factor=1, sample_rate=44100, chunk_duration=0.1,
+                 hop_duration=None):
+    # Decodes a directory, manifest or list of WAV files over a process pool
+    # and writes one JSON line per file (file, text, symbols with sample,
+    # time and confidence, duration, decode_time) in input order
+    inputs = list_decode_inputs(source)
+    jobs = jobs or os.cpu_count()
+
+    start = time.perf_counter()
+    n_files = n_errors = 0
+    audio_seconds = 0.0
+    with open(output_jsonl, 'w', encoding='utf-8') as out:
+        for record in decode_records(inputs, jobs, chunksize, detector,
+                                     speed_factor, sample_rate,
+                                     chunk_duration, hop_duration):
+            out.write(json.dumps(record) + "\n")
+            n_files += 1
+            n_errors += 'error' in record
+            audio_seconds += record.get('duration', 0.0)
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "files": n_files,
+        "errors": n_errors,
+        "audio_seconds": audio_seconds,
+        "elapsed": elapsed,
+        "files_per_s": n_files / elapsed if elapsed else 0.0,
+        "audio_seconds_per_s": audio_seconds / elapsed if elapsed else 0.0,
+        "jobs": jobs,
+    }
+    print(f"[DECODE] Batch: {n_files} files ({audio_seconds:.1f}s of audio, "
+          f"{n_errors} errors) in {elapsed:.2f}s with {jobs} workers: "
+          f"{stats['files_per_s']:.1f} files/s, "
+          f"{stats['audio_seconds_per_s']:.1f} audio-s/s")
+    print(f"[DECODE] Results written to '{output_jsonl}'")
+    return stats
+
+def speed_ratio(factor, max_denominator=1000):
+    # Reduces a speed factor (int, float, Fraction or a string such as
+    # '7.5' or '49/4') to a coprime (numerator, denominator) pair
+    ratio = factor if isinstance(factor, Fraction) else Fraction(str(factor))
+    ratio = ratio.limit_denominator(max_denominator)
+    if ratio <= 0:
+        raise ValueError(f"Speed factor must be positive, got {factor}")
+    return ratio.numerator, ratio.denominator
+
+def _resample(signal, up, down, axis=0):
+    # resample_poly with the filter design shared through FILTER_CACHE
+    if up == down:
+        return np.array(signal, copy=True)
+    return resample_poly(signal, up, down, axis=axis,
+                         window=FILTER_CACHE.polyphase(up, down))
+
+def speedup_signal(signal, factor, axis=0):
+    # Accelerates audio by downsampling with anti-aliasing filter. All
+    # channels are filtered in one call along the time axis.
+    num, den = speed_ratio(factor)
+    fast_signal = _resample(signal, up=den, down=num, axis=axis)
+    return fast_signal
+
+def slowdown_signal(signal, factor, axis=0):
+    # Decelerates audio by upsampling with anti-imaging filter
+    num, den = speed_ratio(factor)
+    slow_signal = _resample(signal, up=num, down=den, axis=axis)
+    return slow_signal
+
+class StreamingResampler:
+    # Block-by-block equivalent of resample_poly(x, up, down) with its
+    # default Kaiser filter and zero padding. The input tail the filter
+    # still needs is carried between blocks, so the concatenated output
+    # equals the one-shot result sample for sample, including both edges
+    # (the first outputs see the same implicit zeros before the signal,
+    # and flush() supplies the zeros after it). Blocks are 1-D or
+    # (frames, channels) as read by soundfile; channels are filtered together.
+    def __init__(self, up, down):
+        g = math.gcd(up, down)
+        self.up = up // g
+        self.down = down // g
+        self.h = None
+        self.n_pre_remove = 0
+
+        if not self.up == self.down == 1:
+            half_len = 10 * max(self.up, self.down)
+            h = FILTER_CACHE.polyphase(self.up, self.down) * self.up
+            # Same alignment as resample_poly: pad so outputs land on the filter centre
+            n_pre_pad = self.down - half_len % self.down
+            self.h = np.concatenate((np.zeros(n_pre_pad), h))
+            self.n_pre_remove = (half_len + n_pre_pad) // self.down
+        self.reset()
+
+    def reset(self):
+        self._buf = None
+        self._buf_start = 0
+        self._next = self.n_pre_remove
+        self.n_in = 0
+        # Trailing block shape, () for mono, so every output has the same layout
+        self._channels = ()
+
+    def _emit(self, stop):
+        # Full-filter outputs [self._next, stop); self._buf_start is kept a
+        # multiple of down so upfirdn over the buffer lands on the global grid
+        if stop <= self._next:
+            return np.zeros((0,) + self._buf.shape[1:])
+        y = upfirdn(self.h, self._buf, self.up, self.down, axis=0)
+        offset = self._buf_start * self.up // self.down
+        out = y[self._next - offset:stop - offset]
+        self._next = stop
+
+        # Drop input the next output no longer reaches
+        keep = max(0, (self._next * self.down - (len(self.h) - 1)) // self.up)
+        keep -= keep % self.down
+        if keep > self._buf_start:
+            self._buf = self._buf[keep - self._buf_start:]
+            self._buf_start = keep
+        return out
+
+    def process(self, block):
+        # Returns every output sample that no longer depends on future input
+        self._channels = np.shape(block)[1:]
+        if self.up == self.down == 1:
+            self.n_in += len(block)
+            return np.array(block, dtype=float)
+        if self._buf is None:
+            self._buf = np.zeros((0,) + self._channels)
+        self._buf = np.concatenate((self._buf, block))
+        self.n_in += len(block)
+        end = self._buf_start + len(self._buf)
+        return self._emit(-(-end * self.up // self.down))
+
+    def flush(self):
+        # Returns the remaining outputs, as if the input were followed by zeros
+        if self.up == self.down == 1 or self._buf is None:
+            return np.zeros((0,) + self._channels)
+        n_out = -(-self.n_in * self.up // self.down)
+        stop = self.n_pre_remove + n_out
+        needed = ((stop - 1) * self.down) // self.up + 1
+        end = self._buf_start + len(self._buf)
+        if needed > end:
+            pad = np.zeros((needed - end,) + self._buf.shape[1:])
+            self._buf = np.concatenate((self._buf, pad))
+        return self._emit(stop)
+
+def resample_file(input_file, output_file, up, down, blocksize=65536):
+    # Streams input_file through a StreamingResampler into output_file
+    # (same sample rate, so the audio is sped up or slowed down). Memory
+    # stays constant whatever the file length, and the channel layout is
+    # kept. Returns (frames in, frames out).
+    resampler = StreamingResampler(up, down)
+    frames_out = 0
+    with sf.SoundFile(input_file) as fin, \
+            sf.SoundFile(output_file, 'w', samplerate=fin.samplerate,
+                         channels=fin.channels) as fout:
+        for block in fin.blocks(blocksize=blocksize, always_2d=True):
+            out = resampler.process(block)
+            if len(out):
+                fout.write(out)
+            frames_out += len(out)
+        out = resampler.flush()
+        if len(out):
+            fout.write(out)
+        frames_out += len(out)
+    return resampler.n_in, frames_out
+
+def speedup_file(input_file, output_file, factor, blocksize=65536):
+    # Streaming speedup_signal for files of any length
+    num, den = speed_ratio(factor)
+    return resample_file(input_file, output_file, den, num, blocksize)
+
+def slowdown_file(input_file, output_file, factor, blocksize=65536):
+    # Streaming slowdown_signal for files of any length
+    num, den = speed_ratio(factor)
+    return resample_file(input_file, output_file, num, den, blocksize)
+
+def _read_head(path, frames):
+    return sf.read(path, frames=frames)[0]
+
+def test_speed_transform(input_file, speed_factor=10):
+    # Tests speed transformation by accelerating then decelerating. Files are
+    # processed block by block, only the plotted heads are loaded.
+    sr = sf.info(input_file).samplerate
+    print(f"[SPEED TEST] Reading '{input_file}' @ {sr} Hz")
+
+    print(f"Accelerating x{speed_factor}...")
+    fast_file = f"fast_{input_file}"
+    n_audio, n_fast = speedup_file(input_file, fast_file, speed_factor)
+    print(f"Fast version saved to {fast_file}")
+
+    print(f"Slowing down x{speed_factor} (to original duration approx.)...")
+    restored_file = f"restored_{input_file}"
+    _, n_restored = slowdown_file(fast_file, restored_file, speed_factor)
+    print(f"Restored version saved to {restored_file}")
+
+    # Visualize results (matplotlib is only loaded for this plot)
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 6))
+    plt.subplot(311)
+    plt.title("Original (first 1000 samples)")
+    plt.plot(_read_head(input_file, 1000))
+
+    plt.subplot(312)
+    plt.title(f"Accelerated x{speed_factor} (first 1000 samples)")
+    plt.plot(_read_head(fast_file, 1000))
+
+    plt.subplot(313)
+    plt.title("Restored (first 1000 samples)")
+    plt.plot(_read_head(restored_file, 1000))
+    plt.tight_layout()
+    plt.show()
+
+    print(f"Original length : {n_audio} samples")
+    print(f"Fast length     : {n_fast} samples")
+    print(f"Restored length : {n_restored} samples")
+
+    if n_restored == n_audio:
+        diff = 0.0
+        for audio, restored in zip(sf.blocks(input_file, blocksize=65536),
+                                   sf.blocks(restored_file, blocksize=65536)):
+            diff = max(diff, np.max(np.abs(audio - restored)))
+        print(f"Max difference: {diff:.4f}")
+    else:
+        print("Note: The length differs from the original. Some mismatch is normal.")
+
+def parse_factor(text, default):
+    # Menu input -> Fraction speed factor, default when empty or invalid
+    try:
+        return Fraction(*speed_ratio(text))
+    except (ValueError, ZeroDivisionError):
+        return Fraction(default)
+
+def main():
+    print("=== DTMF All-In-One ===")
+    while True:
+        print("\nOptions:")
+        print("1) Encode phrase to DTMF (WAV)")
+        print("2) Start live DTMF decoder (micro)")
+        print("3) Test speed transform (accelerate/decelerate) a WAV file")
+        print("4) Slow down an accelerated file")
+        print("5) Decode a WAV file")
+        print("6) Quit")
+        choice = input("Choose an option: ").strip()
+
+        if choice == "1":
+            phrase = input("Enter the phrase to encode: ")
+            out_file = input("Output file (e.g. 'my_encoded.wav') [default=encoded_phrase.wav]: ") or "encoded_phrase.wav"
+            encode_phrase(phrase, out_file)
+        elif choice == "2":
+            print("Starting live DTMF decoder...")
+            decoder = LiveDecoder()
+            decoder.start_listening()
+        elif choice == "3":
+            in_file = input("Which WAV file to transform?: ").strip()
+            if not in_file:
+                print("Invalid file!")
+                continue
+            fac_str = input("Acceleration factor (e.g. 10, 7.5 or 49/4) [default=10]: ").strip()
+            speed_fac = parse_factor(fac_str, default=10)
+            test_speed_transform(in_file, speed_fac)
+        elif choice == "4":
+            in_file = input("Which WAV file to slow down?: ").strip()
+            if not in_file:
+                print("Invalid file!")
+                continue
+            fac_str = input("Slowdown factor (e.g. 10, 7.5 or 49/4) [default=10]: ").strip()
+            speed_fac = parse_factor(fac_str, default=10)
+
+            print(f"Slowing down x{speed_fac}...")
+            slow_file = f"slowed_{in_file}"
+            slowdown_file(in_file, slow_file, speed_fac)
+            print(f"Slowed version saved to {slow_file}")
+        elif choice == "5":
+            in_file = input("Which WAV file to decode?: ").strip()
+            if not in_file:
+                print("Invalid file!")
+                continue
+            fac_str = input("Speed factor of the file (1 if not accelerated) [default=1]: ").strip()
+            speed_fac = parse_factor(fac_str, default=1)
+            result = decode_file(in_file, speed_factor=float(speed_fac))
+            for sym in result.symbols:
+                print(f"  {sym.time:8.3f}s  {sym.char}")
+            print(f"[DECODE] Decoded text: {result.text}")
+        elif choice == "6":
+            print("Exiting program.")
+            break
+        else:
+            print("Invalid choice. Please enter 1-6.")
+
+def _expand_inputs(patterns):
+    # Expands globs (quoted, or from shells that leave them alone), keeps '-'
+    paths = []
+    for pattern in patterns:
+        if pattern == '-' or not any(c in pattern for c in '*?['):
+            paths.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            raise SystemExit(f"error: no files match '{pattern}'")
+        paths.extend(matches)
+    return paths
+
+def _open_input(path):
+    # '-' reads all of stdin into memory, libsndfile has to seek in a WAV
+    if path != '-':
+        return path
+    data = io.BytesIO(sys.stdin.buffer.read())
+    data.name = '-'
+    return data
+
+@contextlib.contextmanager
+def _open_output(path, stdout):
+    # '-' writes to an in-memory WAV (the header is finalized by seeking
+    # back), copied to stdout once complete
+    if path != '-':
+        yield path
+        return
+    data = io.BytesIO()
+    data.name = 'stdout.wav'
+    yield data
+    stdout.write(data.getvalue())
+    stdout.flush()
+
+def _cli_encode(args, stdout):
+    params = dict(char_duration=args.char_duration, gap_duration=args.gap_duration)
+    if args.manifest:
+        stats = batch_encode(args.manifest, args.output_dir, jobs=args.jobs,
+                             method=args.method, compression=args.compression,
+                             **params)
+        return 1 if stats["errors"] else 0
+
+    with _open_output(args.output, stdout) as output:
+        if args.text:
+            encode_phrase(" ".join(args.text), output, method=args.method,
+                          compression=args.compression, **params)
+        elif args.compression != 1:
+            with open(args.input if args.input != '-' else sys.stdin.fileno(),
+                      encoding='utf-8', closefd=args.input != '-') as f:
+                encode_phrase(f.read(), output, method=args.method,
+                              compression=args.compression, **params)
+        elif args.input == '-':
+            encode_stream(iter(lambda: sys.stdin.read(65536), ""), output, **params)
+        else:
+            encode_text_file(args.input, output, **params)
+    return 0
+
+def _cli_decode(args, stdout):
+    paths = _expand_inputs(args.inputs)
+    if '-' in paths and len(paths) > 1:
+        raise SystemExit("error: stdin ('-') cannot be combined with other inputs")
+    inputs = list_decode_inputs([_open_input(path) for path in paths])
+    jobs = 1 if paths == ['-'] else args.jobs
+    failed = 0
+    for record in decode_records(inputs, jobs, detector=args.detector,
+                                 speed_factor=float(args.speed_factor),
+                                 chunk_duration=args.chunk_duration,
+                                 hop_duration=args.hop_duration):
+        failed += 'error' in record
+        if args.jsonl:
+            line = json.dumps(record)
+        elif 'error' in record:
+            print(f"[DECODE] {record['file']}: {record['error']}")
+            continue
+        elif len(paths) > 1:
+            line = f"{record['file']}\t{record['text']}"
+        else:
+            line = record['text']
+        stdout.write((line + "\n").encode('utf-8'))
+    return 1 if failed else 0
+
+def _cli_listen(args, stdout):
+    # Live decoding from the microphone or another AudioSource
+    if args.wav:
+        source = WavFileSource(args.wav, realtime=args.realtime)
+    elif args.stdin:
+        source = StdinSource(args.rate, args.pcm_dtype, args.channels)
+    elif args.synthetic:
+        source = SyntheticSource(args.synthetic, sample_rate=args.rate,
+                                 realtime=args.realtime, repeat=args.repeat,
+                                 snr_db=args.snr_db)
+    else:
+        source = None
+    # Sources that do not keep real time wait for the decoder instead of overrunning it
+    realtime = source is None or source.realtime
+    decoder = LiveDecoder(detector=args.detector, source=source,
+                          overflow='drop_oldest' if realtime else 'block',
+                          stats_interval=args.stats,
+                          speed_factor=float(args.speed_factor),
+                          chunk_duration=args.chunk_duration,
+                          hop_duration=args.hop_duration)
+    start = time.perf_counter()
+    text = decoder.start_listening(print_symbols=not args.quiet)
+    elapsed = time.perf_counter() - start
+    audio = decoder.position / decoder.sample_rate
+    print(f"[LIVE] {audio:.1f}s of audio in {elapsed:.2f}s "
+          f"(x{audio / elapsed if elapsed else 0:.1f} real time)")
+    stdout.write((text + "\n").encode('utf-8'))
+    return 0
+
+def _resample_job(job):
+    # Pool task for the speedup/slowdown subcommands: (frames in, frames
+    # out, error). A file that cannot be read or written gets an error
+    # message, as in decode, instead of ending the whole run.
+    try:
+        return resample_file(*job) + (None,)
+    except (RuntimeError, OSError) as exc:
+        return 0, 0, str(exc)
+
+def _cli_resample(args, stdout):
+    num, den = speed_ratio(args.factor)
+    up, down = (den, num) if args.command == 'speedup' else (num, den)
+    prefix = 'fast_' if args.command == 'speedup' else 'slowed_'
+    paths = _expand_inputs(args.inputs)
+    if args.output and len(paths) > 1:
+        raise SystemExit("error: --output takes a single input, use --output-dir")
+
+    if paths == ['-']:
+        with _open_output(args.output or '-', stdout) as output:
+            _, _, error = _resample_job((_open_input('-'), output, up, down))
+        if error is not None:
+            print(f"[SPEED] -: {error}")
+        return 1 if error is not None else 0
+
+    jobs = []
+    for path in paths:
+        output = args.output or os.path.join(
+            args.output_dir or os.path.dirname(path), prefix + os.path.basename(path))
+        jobs.append((path, output, up, down))
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.output == '-':
+        with _open_output('-', stdout) as output:
+            _, _, error = _resample_job((paths[0], output, up, down))
+        if error is not None:
+            print(f"[SPEED] {paths[0]}: {error}")
+        return 1 if error is not None else 0
+
+    n_jobs = args.jobs or os.cpu_count()
+    inline = n_jobs == 1 or len(jobs) == 1
+    with (contextlib.nullcontext() if inline
+          else ProcessPoolExecutor(max_workers=n_jobs)) as pool:
+        results = map(_resample_job, jobs) if inline else pool.map(_resample_job, jobs)
+        failed = 0
+        for (path, output, _, _), (n_in, n_out, error) in zip(jobs, results):
+            if error is not None:
+                failed += 1
+                print(f"[SPEED] {path}: {error}")
+                continue
+            print(f"[SPEED] {path} ({n_in} frames) -> {output} ({n_out} frames)")
+    return 1 if failed else 0
+
+def _cli_roundtrip(args, stdout):
+    # Encode -> accelerate -> decode in memory; exits non-zero on a mismatch
+    text = " ".join(args.text) if args.text else sys.stdin.read()
+    expected = "".join(text.split()).upper()
+    factor = Fraction(*speed_ratio(args.factor))
+    sr = 44100
+    if args.direct:
+        signal = synthesize_phrase(text, sample_rate=sr, compression=factor)
+    else:
+        signal = speedup_signal(synthesize_phrase(text, sample_rate=sr), factor)
+    signal /= (np.max(np.abs(signal)) + 1e-9)
+
+    framing = dict(chunk_duration=args.chunk_duration,
+                   hop_duration=args.hop_duration)
+    start = time.perf_counter()
+    if args.restore:
+        result = FileDecoder(sr, args.detector, **framing).decode_blocks(
+            [slowdown_signal(signal, factor)])
+    else:
+        result = FileDecoder(sr, args.detector, speed_factor=float(factor),
+                             **framing).decode_blocks([signal])
+    elapsed = time.perf_counter() - start
+
+    print(f"[ROUNDTRIP] x{factor} ({len(signal) / sr:.2f}s of audio) "
+          f"decoded in {elapsed * 1e3:.1f} ms")
+    print(f"[ROUNDTRIP] Expected: {expected}")
+    print(f"[ROUNDTRIP] Decoded : {result.text}")
+    stdout.write((result.text + "\n").encode('utf-8'))
+    return 0 if result.text == expected else 1
+
+def _cli_bench(args, stdout):
+    # benchmarks.py sits next to this file and imports it back
+    import benchmarks
+    names = args.names or [name[len('bench_'):] for name in dir(benchmarks)
+                           if name.startswith('bench_')]
+    if args.list:
+        for name in names:
+            print(name, file=sys.stderr)
+        return 0
+    if args.suite:
+        regressions = benchmarks.run_suite(args.results, args.baseline,
+                                           args.threshold, args.quick,
+                                           args.save_baseline)
+        return 1 if regressions else 0
+    if not args.names:
+        benchmarks.run_all()
+        return 0
+    for name in names:
+        bench = getattr(benchmarks, 'bench_' + name, None)
+        if bench is None:
+            raise SystemExit(f"error: unknown benchmark '{name}'")
+        bench()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="prototype.py",
+        description="Extended DTMF encoder/decoder with time compression. "
+                    "Run without arguments for the interactive menu. "
+                    "'-' stands for stdin/stdout; status goes to stderr.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def factor(text):
+        # argparse type: validates with speed_ratio, keeps the exact Fraction
+        try:
+            return Fraction(*speed_ratio(text))
+        except (ValueError, ZeroDivisionError):
+            raise argparse.ArgumentTypeError(f"invalid speed factor '{text}'")
+
+    encode = commands.add_parser('encode', help="text to DTMF WAV")
+    encode.add_argument('text', nargs='*', help="phrase (default: read --input)")
+    encode.add_argument('-i', '--input', default='-',
+                        help="text file to encode, '-' for stdin (default)")
+    encode.add_argument('-o', '--output', default="encoded_phrase.wav",
+                        help="output WAV, '-' for stdout")
+    encode.add_argument('--manifest', help="CSV/JSONL batch manifest (id, text, params)")
+    encode.add_argument('--output-dir', default=".", help="batch output directory")
+    encode.add_argument('--char-duration', type=float, default=0.15)
+    encode.add_argument('--gap-duration', type=float, default=0.3)
+    encode.add_argument('--method', choices=ENCODE_METHODS, default='cached')
+    encode.add_argument('--compression', type=factor, default=Fraction(1),
+                        help="synthesize already accelerated by this factor")
+    encode.set_defaults(func=_cli_encode)
+
+    decode = commands.add_parser('decode', help="DTMF WAV files to text")
+    decode.add_argument('inputs', nargs='+', help="WAV files or globs, '-' for stdin")
+    decode.add_argument('--detector', choices=sorted(DETECTORS), default='fft')
+    decode.add_argument('--speed-factor', type=factor, default=Fraction(1),
+                        help="decode audio accelerated by this factor as is")
+    decode.add_argument('--jsonl', action='store_true',
+                        help="one JSON record per file (symbols, timings)")
+    decode.set_defaults(func=_cli_decode)
+
+    for name, verb in (('speedup', "accelerate"), ('slowdown', "decelerate")):
+        resample = commands.add_parser(name, help=f"{verb} WAV files")
+        resample.add_argument('inputs', nargs='+', help="WAV files or globs, '-' for stdin")
+        resample.add_argument('-f', '--factor', type=factor, default=Fraction(10))
+        resample.add_argument('-o', '--output', help="output WAV, '-' for stdout")
+        resample.add_argument('--output-dir', help="directory for batch outputs "
+                              "(default: next to each input, prefixed)")
+        resample.set_defaults(func=_cli_resample)
+
+    roundtrip = commands.add_parser('roundtrip', help="encode, accelerate and "
+                                    "decode a phrase in memory")
+    roundtrip.add_argument('text', nargs='*', help="phrase (default: stdin)")
+    roundtrip.add_argument('-f', '--factor', type=factor, default=Fraction(10))
+    roundtrip.add_argument('--direct', action='store_true',
+                           help="synthesize at the compressed rate")
+    roundtrip.add_argument('--restore', action='store_true',
+                           help="slow down before decoding")
+    roundtrip.add_argument('--detector', choices=sorted(DETECTORS), default='fft')
+    roundtrip.set_defaults(func=_cli_roundtrip)
+
+    listen = commands.add_parser('listen', help="live decoding from the "
+                                 "microphone, a WAV, raw PCM on stdin or a synthetic signal")
+    sources = listen.add_mutually_exclusive_group()
+    sources.add_argument('--wav', help="play this file into the decoder")
+    sources.add_argument('--stdin', action='store_true', help="raw PCM on stdin")
+    sources.add_argument('--synthetic', metavar='TEXT', help="encode TEXT in memory")
+    listen.add_argument('--realtime', action='store_true',
+                        help="pace --wav/--synthetic at real time (default: as fast as possible)")
+    listen.add_argument('--rate', type=int, default=44100,
+                        help="sample rate of --stdin/--synthetic")
+    listen.add_argument('--pcm-dtype', choices=StdinSource.PCM_DTYPES, default='int16')
+    listen.add_argument('--channels', type=int, default=1, help="--stdin channels")
+    listen.add_argument('--repeat', type=int, default=1, help="--synthetic repetitions")
+    listen.add_argument('--snr-db', type=float, help="--synthetic white noise level")
+    listen.add_argument('--detector', choices=sorted(DETECTORS), default='fft')
+    listen.add_argument('--speed-factor', type=factor, default=Fraction(1))
+    listen.add_argument('--stats', type=float, metavar='SECONDS',
+                        help="print pipeline stats every SECONDS")
+    listen.add_argument('--quiet', action='store_true', help="no per-symbol output")
+    listen.set_defaults(func=_cli_listen)
+
+    bench = commands.add_parser('bench', help="run benchmarks.py")
+    bench.add_argument('names', nargs='*', help="benchmarks to run (default: all)")
+    bench.add_argument('--list', action='store_true', help="list benchmark names")
+    bench.add_argument('--suite', action='store_true',
+                       help="regression suite: JSON results compared to a baseline")
+    bench.add_argument('--results', default="bench_results.json")
+    bench.add_argument('--baseline', default="bench_baseline.json")
+    bench.add_argument('--threshold', type=float, default=0.3)
+    bench.add_argument('--quick', action='store_true')
+    bench.add_argument('--save-baseline', action='store_true')
+    bench.set_defaults(func=_cli_bench)
+
+    for sub in (decode, roundtrip, listen):
+        sub.add_argument('--chunk-duration', type=float, default=0.1,
+                         help="analysis frame in seconds, shorten it for "
+                              "symbols under ~100 ms (default: 0.1)")
+        sub.add_argument('--hop-duration', type=float,
+                         help="seconds between frames (default: one frame)")
+    for sub in (encode, decode, commands.choices['speedup'],
+                commands.choices['slowdown']):
+        sub.add_argument('-j', '--jobs', type=int, default=None,
+                         help="worker processes for batches (default: all cores)")
+    return parser
+
+def cli(argv=None):
+    # Scriptable entry point; the interactive menu when there are no arguments.
+    # stdout carries only data (WAV bytes, decoded text), messages go to stderr.
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        main()
+        return 0
+    args = build_parser().parse_args(argv)
+    stdout = sys.stdout.buffer
+    with contextlib.redirect_stdout(sys.stderr):
+        return args.func(args, stdout)
+
+if __name__ == "__main__":
+    sys.exit(cli())